@@ -2,12 +2,21 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.user import User
-from app.api.deps import admin_only
+from app.api.deps import admin_only, token_versions
+from app.core.pool_metrics import pool_stats
 import os
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
+def _revoke_tokens(db: Session, user: User) -> None:
+    # Invalidates every token issued so far; commit is left to the caller and
+    # this worker's cache only picks up the new version once it succeeds
+    user.token_version = (user.token_version or 0) + 1
+    db.flush()
+    token_versions.note_version_on_commit(db, user.id, user.token_version)
+
+
 @router.post("/assign-role")
 def assign_role(
     user_id: int,
@@ -20,11 +29,28 @@ def assign_role(
         raise HTTPException(404, "User not found")
 
     user.role = role.upper()
+    _revoke_tokens(db, user)
     db.commit()
 
     return {"message": f"Role set to {role.upper()}"}
 
 
+@router.post("/revoke-tokens")
+def revoke_tokens(
+    user_id: int,
+    admin=Depends(admin_only),
+    db: Session = Depends(get_db)
+):
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(404, "User not found")
+
+    _revoke_tokens(db, user)
+    db.commit()
+
+    return {"message": "Tokens revoked"}
+
+
 @router.get("/users")
 def list_users(
     admin=Depends(admin_only),
@@ -33,6 +59,11 @@ def list_users(
     return db.query(User.id, User.phone, User.role).all()
 
 
+@router.get("/db-pool")
+def db_pool_stats(admin=Depends(admin_only)):
+    return pool_stats()
+
+
 ADMIN_SECRET_KEY = os.getenv("ADMIN_SECRET_KEY")
 
 
@@ -50,6 +81,7 @@ def claim_admin(
         raise HTTPException(status_code=404, detail="User not found")
 
     user.role = "ADMIN"
+    _revoke_tokens(db, user)
     db.commit()
 
     return {"message": "Admin access granted"}
@@ -1,23 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, update, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.api.deps import admin_only
 from app.models.attendance import Attendance
+from app.models.employee import Employee
+from app.schemas.attendance import BulkApproveRequest
+from app.services.attendance_matrix import MonthMatrix
+from app.utils.date_range import MIN_YEAR, MAX_YEAR, month_bounds
 
 router = APIRouter(prefix="/attendance/admin", tags=["Attendance Admin"])
 
 
 @router.post("/approve")
-def approve_attendance(
+async def approve_attendance(
     attendance_id: int,
     approve: bool = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin=Depends(admin_only)
 ):
-    record = db.query(Attendance).filter(
-        Attendance.id == attendance_id
-    ).first()
+    record = await db.get(Attendance, attendance_id)
 
     if not record:
         raise HTTPException(status_code=404, detail="Attendance not found")
@@ -25,9 +28,82 @@ def approve_attendance(
     record.status = "APPROVED" if approve else "REJECTED"
     record.approved_by = admin["user_id"]
 
-    db.commit()
+    await db.commit()
 
     return {
         "attendance_id": attendance_id,
         "status": record.status
     }
+
+
+@router.get("/month")
+async def month_matrix(
+    month: int,
+    year: int = Query(ge=MIN_YEAR, le=MAX_YEAR),
+    db: AsyncSession = Depends(get_async_db),
+    admin=Depends(admin_only)
+):
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="month must be 1-12")
+
+    start, end = month_bounds(month, year)
+    matrix = MonthMatrix(start, (end - start).days)
+
+    # One outer-joined range query, streamed row by row; employees with no
+    # attendance in the month still get an (empty) row
+    result = await db.stream(
+        select(
+            Employee.id,
+            Employee.name,
+            Attendance.date,
+            Attendance.status,
+            Attendance.worked_minutes
+        )
+        .outerjoin(Attendance, and_(
+            Attendance.employee_id == Employee.id,
+            Attendance.date >= start,
+            Attendance.date < end
+        ))
+        .order_by(Employee.id)
+    )
+
+    async for employee_id, name, day, status, worked_minutes in result:
+        if employee_id not in matrix.names:
+            matrix.add_employee(employee_id, name)
+        if day is not None:
+            matrix.set(employee_id, day, status, worked_minutes)
+
+    return {"month": month, "year": year, **matrix.as_dict()}
+
+
+@router.post("/bulk-approve")
+async def bulk_approve(
+    data: BulkApproveRequest,
+    db: AsyncSession = Depends(get_async_db),
+    admin=Depends(admin_only)
+):
+    if data.ids:
+        condition = Attendance.id.in_(data.ids)
+    elif data.month is not None and data.year is not None:
+        start, end = month_bounds(data.month, data.year)
+        condition = and_(
+            Attendance.date >= start,
+            Attendance.date < end,
+            Attendance.status.in_(data.statuses)
+        )
+    else:
+        raise HTTPException(
+            status_code=400, detail="Provide ids, or month and year"
+        )
+
+    status = "APPROVED" if data.approve else "REJECTED"
+
+    result = await db.execute(
+        update(Attendance)
+        .where(condition)
+        .values(status=status, approved_by=admin["user_id"])
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+    return {"status": status, "updated": result.rowcount}
@@ -1,82 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import update, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, date, time
 
-from app.core.database import get_db
+from app.core.database import get_async_db, dialect_insert
 from app.api.deps import admin_only
+from app.core.security import verify_kiosk_key
 from app.models.attendance import Attendance
-from app.utils.attendance_calc import calculate_worked_minutes
+from app.schemas.attendance import KioskSyncRequest
+from app.services.kiosk_sync import sync_kiosk_punches
+from app.utils.attendance_calc import (
+    GRACE_LIMIT,
+    calculate_worked_minutes,
+    worked_minutes_sql,
+)
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
 
-OFFICE_ENTRY = time(10, 0)
-GRACE_MINUTES = 30
-
 
 @router.post("/entry")
-def punch_entry(employee_id: int, db: Session = Depends(get_db)):
-    today = date.today()
-
-    existing = db.query(Attendance).filter(
-        Attendance.employee_id == employee_id,
-        Attendance.date == today
-    ).first()
-
-    if existing:
-        raise HTTPException(400, "Entry already recorded")
-
-    record = Attendance(
+async def punch_entry(
+    employee_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # One statement: a double tap or concurrent punch hits
+    # uq_attendance_employee_date and returns no row instead of racing
+    insert_ = dialect_insert(db)
+    stmt = insert_(Attendance).values(
         employee_id=employee_id,
-        date=today,
+        date=date.today(),
         entry_time=datetime.now().time(),
         status="PENDING"
-    )
+    ).on_conflict_do_nothing(
+        index_elements=["employee_id", "date"]
+    ).returning(Attendance.id)
 
-    db.add(record)
-    db.commit()
+    attendance_id = (await db.execute(stmt)).scalar()
+    await db.commit()
+
+    if attendance_id is None:
+        raise HTTPException(400, "Entry already recorded")
     return {"message": "Entry recorded"}
 
 
 @router.post("/exit")
-def punch_exit(employee_id: int, db: Session = Depends(get_db)):
-    today = date.today()
+async def punch_exit(
+    employee_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    exit_time = datetime.now().time()
+    dialect_name = db.get_bind().dialect.name
+
+    # Single UPDATE ... RETURNING; worked minutes are computed from the
+    # stored entry_time in SQL, so concurrent exits can't lose an update
+    stmt = (
+        update(Attendance)
+        .where(
+            Attendance.employee_id == employee_id,
+            Attendance.date == date.today()
+        )
+        .values(
+            exit_time=exit_time,
+            worked_minutes=worked_minutes_sql(
+                dialect_name, Attendance.entry_time, exit_time
+            ),
+            status=case(
+                (Attendance.entry_time <= GRACE_LIMIT, "AUTO"),
+                else_="PENDING"
+            )
+        )
+        .returning(Attendance.status)
+        .execution_options(synchronize_session=False)
+    )
 
-    record = db.query(Attendance).filter(
-        Attendance.employee_id == employee_id,
-        Attendance.date == today
-    ).first()
+    status = (await db.execute(stmt)).scalar()
+    await db.commit()
 
-    if not record:
+    if status is None:
         raise HTTPException(404, "Entry not found")
+    return {"message": "Exit recorded", "status": status}
 
-    record.exit_time = datetime.now().time()
 
-    record.worked_minutes = calculate_worked_minutes(
-        record.entry_time, record.exit_time
-    )
-
-    grace_limit = (
-        datetime.combine(today, OFFICE_ENTRY)
-        .replace(minute=OFFICE_ENTRY.minute + GRACE_MINUTES)
-        .time()
-    )
-
-    record.status = "AUTO" if record.entry_time <= grace_limit else "PENDING"
+@router.post("/kiosk-sync")
+async def kiosk_sync(
+    data: KioskSyncRequest,
+    x_kiosk_key: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Punches carry device-chosen timestamps, so only registered kiosks may sync
+    if not verify_kiosk_key(data.device_id, x_kiosk_key):
+        raise HTTPException(401, "Invalid kiosk credentials")
 
-    db.commit()
-    return {"message": "Exit recorded", "status": record.status}
+    # Replaces replaying a kiosk's offline buffer through /entry and /exit
+    return await sync_kiosk_punches(db, data.device_id, data.punches)
 
 
 @router.post("/approve")
-def approve_attendance(
+async def approve_attendance(
     attendance_id: int,
     approve: bool,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin=Depends(admin_only)
 ):
-    record = db.query(Attendance).filter(
-        Attendance.id == attendance_id
-    ).first()
+    record = await db.get(Attendance, attendance_id)
 
     if not record:
         raise HTTPException(404, "Attendance not found")
@@ -84,16 +111,16 @@ def approve_attendance(
     record.status = "APPROVED" if approve else "REJECTED"
     record.approved_by = admin["user_id"]
 
-    db.commit()
+    await db.commit()
     return {"message": "Attendance updated"}
 
 
 @router.post("/manual")
-def manual_attendance(
+async def manual_attendance(
     employee_id: int,
     entry_time: time,
     exit_time: time,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin=Depends(admin_only)
 ):
     record = Attendance(
@@ -107,5 +134,9 @@ def manual_attendance(
     )
 
     db.add(record)
-    db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(400, "Attendance already recorded for today")
     return {"message": "Manual attendance added by admin"}
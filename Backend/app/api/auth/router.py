@@ -1,44 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.user import User
-from app.utils.otp import generate_otp
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.services.patient_service import get_or_create_patient_async
+from app.utils.phone import Phone
+from app.utils.otp import issue_otp, verify_otp_for_phone
 from app.core.security import create_access_token
 from app.schemas.auth import VerifyOTPRequest
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-otp_store = {}
-
 @router.post("/send-otp")
-def send_otp(phone: str):
-    otp = generate_otp()
-    otp_store[phone] = otp
-    print("OTP:", otp)
+async def send_otp(phone: Phone):
+    await issue_otp(phone)
     return {"message": "OTP sent"}
 
 
 @router.post("/verify-otp")
-def verify_otp(
+async def verify_otp(
     data: VerifyOTPRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     phone = data.phone
     otp = data.otp
 
-    if otp_store.get(phone) != otp:
+    if not await verify_otp_for_phone(phone, otp):
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
-    user = db.query(User).filter(User.phone == phone).first()
-    if not user:
-        user = User(phone=phone, role="PATIENT")
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    user = await get_or_create_patient_async(db, phone)
+    await db.commit()
 
     token = create_access_token({
         "user_id": user.id,
-        "role": user.role
+        "role": user.role,
+        "ver": user.token_version or 0
     })
 
     return {
@@ -1,26 +1,30 @@
 from fastapi import APIRouter, HTTPException,Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.models.booking import Booking
 from app.utils.otp import verify_otp_for_phone
+from app.utils.phone import Phone
+from app.services.patient_service import get_or_create_patient_async
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
 @router.post("/")
-def create_booking(
-    phone: str,
+async def create_booking(
+    phone: Phone,
     otp: int,
     doctor_id: int,
     amount: float,
     booking_type: str,
     payment_mode: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if not verify_otp_for_phone(phone, otp):
+    if not await verify_otp_for_phone(phone, otp):
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
+    user = await get_or_create_patient_async(db, phone)
+
     booking = Booking(
-        phone=phone,
+        user_id=user.id,
         doctor_id=doctor_id,
         amount=amount,
         booking_type=booking_type,
@@ -28,8 +32,8 @@ def create_booking(
     )
 
     db.add(booking)
-    db.commit()
-    db.refresh(booking)
+    await db.commit()
+    await db.refresh(booking)
 
     return {
         "message": "Booking created",
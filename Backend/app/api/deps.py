@@ -1,21 +1,21 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from app.core.config import JWT_SECRET, JWT_ALGORITHM
+from app.core.config import TOKEN_VERSION_REFRESH_SECONDS
+from app.core.database import SessionLocal
+from app.core.principal_cache import TokenVersionCache
+from app.core.security import decode_access_token, InvalidTokenError
 
 security = HTTPBearer(auto_error=True)
 
+token_versions = TokenVersionCache(SessionLocal, TOKEN_VERSION_REFRESH_SECONDS)
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     token = credentials.credentials
 
     try:
-        payload = jwt.decode(
-            token,
-            JWT_SECRET,
-            algorithms=[JWT_ALGORITHM]
-        )
+        payload = decode_access_token(token)
 
         user_id = payload.get("user_id")
         role = payload.get("role")
@@ -23,9 +23,13 @@ def get_current_user(
         if not user_id or not role:
             raise HTTPException(status_code=401, detail="Invalid token")
 
+        # Tokens issued before the user's last role change/revocation
+        if payload.get("ver", 0) < token_versions.current_version(user_id):
+            raise HTTPException(status_code=401, detail="Token revoked")
+
         return payload
 
-    except JWTError:
+    except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
@@ -39,3 +43,16 @@ def admin_only(user=Depends(get_current_user)):
             detail="Admin only"
         )
     return user
+
+
+# Lab staff roles; anything else (e.g. PATIENT, DOCTOR) is refused
+STAFF_ROLES = ("ADMIN", "STAFF")
+
+
+def staff_only(user=Depends(get_current_user)):
+    if user["role"] not in STAFF_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Staff only"
+        )
+    return user
@@ -1,12 +1,139 @@
-from fastapi import APIRouter, Depends
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.api.deps import admin_only, staff_only
 from app.models.inventory import Inventory
+from app.models.stock_movement import StockMovement
+from app.services.inventory_service import receive_stock, consume_stock, import_items
+from app.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/inventory", tags=["Inventory"])
 
 @router.post("/")
-def add(item_name: str, type: str, quantity: int, db: Session = Depends(get_db)):
-    db.add(Inventory(item_name=item_name, type=type, quantity=quantity))
+def add(
+    item_name: str,
+    type: str,
+    quantity: int,
+    reorder_level: int | None = None,
+    db: Session = Depends(get_db),
+    user=Depends(staff_only)
+):
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="quantity must be positive")
+
+    # Receiving an existing item adds to its stock instead of a second row
+    item_id, balance = receive_stock(
+        db, item_name, type, quantity, reorder_level, user["user_id"]
+    )
     db.commit()
-    return {"message": "Item added"}
+    return {"message": "Item added", "item_id": item_id, "quantity": balance}
+
+
+@router.post("/{item_id}/consume")
+def consume(
+    item_id: int,
+    quantity: int,
+    note: str | None = None,
+    db: Session = Depends(get_db),
+    user=Depends(staff_only)
+):
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="quantity must be positive")
+
+    balance = consume_stock(db, item_id, quantity, user["user_id"], note)
+    db.commit()
+    return {"item_id": item_id, "quantity": balance}
+
+
+@router.get("/low-stock")
+def low_stock(
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    user=Depends(staff_only)
+):
+    # Same predicate as ix_inventory_low_stock, so only the partial index is read
+    items = db.execute(
+        select(Inventory)
+        .where(Inventory.quantity <= Inventory.reorder_level)
+        .order_by(Inventory.quantity)
+        .limit(min(limit, 1000))
+    ).scalars().all()
+
+    return [
+        {
+            "item_id": i.id,
+            "item_name": i.item_name,
+            "type": i.type,
+            "quantity": i.quantity,
+            "reorder_level": i.reorder_level,
+        }
+        for i in items
+    ]
+
+
+@router.get("/{item_id}/movements")
+def movements(
+    item_id: int,
+    cursor: str | None = None,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    user=Depends(staff_only)
+):
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be 1-500")
+
+    # Newest first, keyset on (created_at, id)
+    query = select(StockMovement).where(StockMovement.item_id == item_id)
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(StockMovement.created_at, StockMovement.id)
+            < tuple_(created_at, last_id)
+        )
+
+    rows = db.execute(
+        query.order_by(
+            StockMovement.created_at.desc(),
+            StockMovement.id.desc()
+        ).limit(limit + 1)
+    ).scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {
+        "item_id": item_id,
+        "movements": [
+            {
+                "kind": m.kind,
+                "quantity": m.quantity,
+                "balance_after": m.balance_after,
+                "user_id": m.user_id,
+                "note": m.note,
+                "created_at": m.created_at.isoformat(),
+            }
+            for m in rows
+        ],
+        "next_cursor": next_cursor
+    }
+
+
+@router.post("/import")
+def import_inventory(
+    file: UploadFile = File(...),
+    format: str | None = None,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    fmt = format or os.path.splitext(file.filename or "")[1].lstrip(".").lower()
+    if fmt == "jsonl":
+        fmt = "ndjson"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    return import_items(db, file.file, fmt, admin["user_id"])
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
+from sqlalchemy import select, func, tuple_
+from datetime import date, datetime, time, timedelta
+import csv
+import io
+import json
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.api.deps import admin_only
 
 from app.models.employee import Employee
@@ -10,6 +15,20 @@ from app.models.attendance import Attendance
 from app.models.salary_slip import SalarySlip
 from app.models.doctor_commission import DoctorCommission
 from app.models.commission_rule import CommissionRule
+from app.models.doctor_commission_monthly import DoctorCommissionMonthly
+from app.utils.date_range import MIN_YEAR, MAX_YEAR
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.services.payroll_service import (
+    payable_days_sum,
+    approved_attendance_filter,
+    salary_for,
+    run_payroll,
+)
+from app.services.commission_rollup import rebuild_rollup
+from app.services.commission_service import (
+    invalidate_rule_index,
+    compute_commissions,
+)
 
 router = APIRouter(prefix="/payroll", tags=["Payroll"])
 
@@ -18,10 +37,13 @@ router = APIRouter(prefix="/payroll", tags=["Payroll"])
 def generate_salary(
     employee_id: int,
     month: int,
-    year: int,
+    year: int = Query(ge=MIN_YEAR, le=MAX_YEAR),
     db: Session = Depends(get_db),
     admin=Depends(admin_only)
 ):
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="month must be 1-12")
+
     employee = db.query(Employee).filter(
         Employee.id == employee_id
     ).first()
@@ -29,23 +51,12 @@ def generate_salary(
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
-    approved_attendance = db.query(Attendance).filter(
+    payable_days = db.query(payable_days_sum).filter(
         Attendance.employee_id == employee_id,
-        Attendance.status == "APPROVED",
-        extract("month", Attendance.date) == month,
-        extract("year", Attendance.date) == year
-    ).all()
+        *approved_attendance_filter(month, year)
+    ).scalar() or 0
 
-    payable_days = 0
-
-    for a in approved_attendance:
-        if a.worked_minutes >= 480:          # 8 hours
-            payable_days += 1
-        elif a.worked_minutes >= 240:        # 4 hours
-            payable_days += 0.5
-        # else: less than 4 hours → 0 day
-
-    salary_amount = (employee.base_salary / 30) * payable_days
+    salary_amount = salary_for(employee.base_salary, payable_days)
 
     slip = SalarySlip(
         employee_id=employee_id,
@@ -66,6 +77,27 @@ def generate_salary(
     }
 
 
+@router.post("/run")
+def run_monthly_payroll(
+    month: int,
+    year: int = Query(ge=MIN_YEAR, le=MAX_YEAR),
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="month must be 1-12")
+
+    slips = run_payroll(db, month, year)
+
+    return {
+        "month": month,
+        "year": year,
+        "slips_created": len(slips),
+        "total_salary": sum(s["salary"] for s in slips),
+        "slips": slips
+    }
+
+
 @router.post("/commission-rule")
 def create_commission_rule(
     doctor_id: int | None = None,
@@ -99,6 +131,8 @@ def create_commission_rule(
     db.commit()
     db.refresh(rule)
 
+    invalidate_rule_index()
+
     return {
         "message": "Commission rule created",
         "rule_id": rule.id
@@ -113,24 +147,169 @@ def list_commission_rules(
         CommissionRule.is_active == True
     ).all()
 
+@router.post("/compute-commissions")
+def compute_doctor_commissions(
+    start_date: date,
+    end_date: date,
+    chunk_size: int = 1000,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=400,
+            detail="end_date must not be before start_date"
+        )
+
+    if not 1 <= chunk_size <= 10000:
+        raise HTTPException(
+            status_code=400,
+            detail="chunk_size must be between 1 and 10000"
+        )
+
+    # end_date is inclusive for the caller, half-open for the query
+    result = compute_commissions(
+        db,
+        datetime.combine(start_date, time.min),
+        datetime.combine(end_date + timedelta(days=1), time.min),
+        chunk_size=chunk_size,
+    )
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        **result
+    }
+
+COMMISSION_EXPORT_COLUMNS = (
+    "id",
+    "booking_id",
+    "test_amount",
+    "commission_percentage",
+    "commission_amount",
+    "created_at",
+)
+
+
+def _commission_record(c) -> dict:
+    return {
+        "id": c.id,
+        "booking_id": c.booking_id,
+        "test_amount": c.test_amount,
+        "commission_percentage": c.commission_percentage,
+        "commission_amount": c.commission_amount,
+        "created_at": c.created_at.isoformat() if c.created_at else None,
+    }
+
+
 @router.get("/doctor/{doctor_id}/commission-report")
 def doctor_commission_report(
     doctor_id: int,
+    cursor: str | None = None,
+    limit: int = 50,
     db: Session = Depends(get_db),
     admin=Depends(admin_only)
 ):
-    commissions = db.query(DoctorCommission).filter(
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be 1-500")
+
+    total_commission = db.execute(
+        select(func.coalesce(func.sum(DoctorCommission.commission_amount), 0))
+        .where(DoctorCommission.doctor_id == doctor_id)
+    ).scalar()
+
+    # Newest first, keyset on (created_at, id); created_at is NOT NULL
+    # (migration 0005), so every row has a cursor
+    query = select(DoctorCommission).where(
         DoctorCommission.doctor_id == doctor_id
-    ).all()
+    )
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(DoctorCommission.created_at, DoctorCommission.id)
+            < tuple_(created_at, last_id)
+        )
+
+    commissions = db.execute(
+        query.order_by(
+            DoctorCommission.created_at.desc(),
+            DoctorCommission.id.desc()
+        ).limit(limit + 1)
+    ).scalars().all()
 
-    total_commission = sum(c.commission_amount for c in commissions)
+    next_cursor = None
+    if len(commissions) > limit:
+        commissions = commissions[:limit]
+        last = commissions[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
 
     return {
         "doctor_id": doctor_id,
         "total_commission": total_commission,
-        "records": commissions
+        "records": [_commission_record(c) for c in commissions],
+        "next_cursor": next_cursor
     }
 
+
+def _stream_commissions(doctor_id: int, fmt: str):
+    # Runs after the request's own session is closed, so it owns one
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(
+                *(getattr(DoctorCommission, col) for col in COMMISSION_EXPORT_COLUMNS)
+            )
+            .where(DoctorCommission.doctor_id == doctor_id)
+            .order_by(DoctorCommission.created_at, DoctorCommission.id)
+            .execution_options(yield_per=1000)
+        )
+
+        # Both formats go through _commission_record, so timestamps are
+        # ISO 8601 in either
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=COMMISSION_EXPORT_COLUMNS)
+            writer.writeheader()
+            for partition in rows.partitions():
+                writer.writerows(_commission_record(row) for row in partition)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            for partition in rows.partitions():
+                yield "".join(
+                    json.dumps(_commission_record(row)) + "\n"
+                    for row in partition
+                )
+    finally:
+        db.close()
+
+
+@router.get("/doctor/{doctor_id}/commission-export")
+def doctor_commission_export(
+    doctor_id: int,
+    format: str = "ndjson",   # ndjson / csv
+    admin=Depends(admin_only)
+):
+    if format not in ["ndjson", "csv"]:
+        raise HTTPException(
+            status_code=400,
+            detail="format must be ndjson or csv"
+        )
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+
+    return StreamingResponse(
+        _stream_commissions(doctor_id, format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition":
+                f"attachment; filename=doctor-{doctor_id}-commissions.{format}"
+        }
+    )
+
 @router.get("/doctor/{doctor_id}/commission-summary")
 def doctor_monthly_commission(
     doctor_id: int,
@@ -139,18 +318,64 @@ def doctor_monthly_commission(
     db: Session = Depends(get_db),
     admin=Depends(admin_only)
 ):
-    commissions = db.query(DoctorCommission).filter(
-        DoctorCommission.doctor_id == doctor_id,
-        extract("month", DoctorCommission.created_at) == month,
-        extract("year", DoctorCommission.created_at) == year
-    ).all()
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="month must be 1-12")
 
-    total = sum(c.commission_amount for c in commissions)
+    rollup = db.get(DoctorCommissionMonthly, (doctor_id, year, month))
 
     return {
         "doctor_id": doctor_id,
         "month": month,
         "year": year,
-        "total_commission": total,
-        "records": commissions
+        "total_commission": rollup.total if rollup else 0,
+        "commission_count": rollup.count if rollup else 0
+    }
+
+
+@router.get("/commission-leaderboard")
+def commission_leaderboard(
+    month: int,
+    year: int,
+    limit: int = 10,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="month must be 1-12")
+
+    rows = db.execute(
+        select(DoctorCommissionMonthly)
+        .where(
+            DoctorCommissionMonthly.year == year,
+            DoctorCommissionMonthly.month == month
+        )
+        .order_by(DoctorCommissionMonthly.total.desc())
+        .limit(min(limit, 100))
+    ).scalars().all()
+
+    return {
+        "month": month,
+        "year": year,
+        "doctors": [
+            {
+                "doctor_id": r.doctor_id,
+                "total_commission": r.total,
+                "commission_count": r.count
+            }
+            for r in rows
+        ]
+    }
+
+
+@router.post("/commission-rollup/rebuild")
+def rebuild_commission_rollup(
+    doctor_id: int | None = None,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    rows = rebuild_rollup(db, doctor_id)
+
+    return {
+        "message": "Commission rollup rebuilt",
+        "rows": rows
     }
@@ -1,21 +1,25 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException,Form
+from typing import Annotated
 from sqlalchemy.orm import Session
 from app.api.deps import get_current_user
 from app.core.database import get_db
 from app.models.prescription import Prescription
 from app.utils.file_upload import save_file
+from app.utils.phone import Phone
+from app.services.patient_service import get_or_create_patient
 
 router = APIRouter(prefix="/prescriptions", tags=["Prescriptions"])
 
 @router.post("/upload", operation_id="upload_prescription_file")
 
 def upload_prescription_file(
-    phone: str = Form(...),
+    phone: Annotated[Phone, Form()],
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    path = save_file(file, "prescriptions")
-    pres = Prescription(phone=phone, file_path=path)
+    user = get_or_create_patient(db, phone)
+    path, _ = save_file(db, file)
+    pres = Prescription(user_id=user.id, file_path=path)
     db.add(pres)
     db.commit()
     return {"prescription_id": pres.id}
@@ -1,56 +1,221 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session
-from fastapi.responses import FileResponse
-from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import FileResponse, Response
+import os
+from typing import Annotated
 
-from app.core.database import get_db
+from app.core.config import REPORT_URL_TTL_SECONDS, REPORT_ACCEL_REDIRECT_PREFIX
+from app.core.database import get_db, get_async_db
+from app.core.security import sign_report_url, verify_report_signature
+from app.api.deps import admin_only, get_current_user
 from app.models.report import Report
-from app.models.report_otp import ReportOTP
-from app.utils.otp import generate_otp
+from app.models.user import User
+from app.utils.file_upload import save_file, UPLOAD_DIR
+from app.utils.otp import issue_otp, verify_otp_for_phone, PURPOSE_REPORT
+from app.utils.phone import Phone
+from app.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
-@router.post("/send-otp")
-def send_otp(phone: str, db: Session = Depends(get_db)):
-    otp = generate_otp()   
-    db.add(ReportOTP(phone=phone, otp=otp))
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _report_response(request: Request, report: Report) -> Response:
+    """
+    Serves a report file with a content-hash ETag. Answers If-None-Match
+    with 304, honours Range (via FileResponse), and hands the transfer to
+    nginx when REPORT_ACCEL_REDIRECT_PREFIX is configured.
+    """
+    headers = {
+        "Cache-Control": "private, max-age=0, must-revalidate",
+        "Content-Disposition": 'attachment; filename="report.pdf"',
+    }
+
+    # Blob contents never change, so the hash is a strong validator
+    if report.file_sha256:
+        etag = f'"{report.file_sha256}"'
+        headers["ETag"] = etag
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={
+                "ETag": etag,
+                "Cache-Control": headers["Cache-Control"],
+            })
+
+    if REPORT_ACCEL_REDIRECT_PREFIX:
+        relative = os.path.relpath(report.file_path, UPLOAD_DIR)
+        headers["X-Accel-Redirect"] = REPORT_ACCEL_REDIRECT_PREFIX + relative
+        return Response(headers=headers, media_type="application/pdf")
+
+    return FileResponse(
+        report.file_path,
+        headers=headers,
+        media_type="application/pdf"
+    )
+
+
+async def _otp_checked_report(
+    phone: str, otp: int, report_id: int, db: AsyncSession
+) -> Report:
+    if not await verify_otp_for_phone(phone, otp, PURPOSE_REPORT):
+        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
+
+    report = (await db.execute(
+        select(Report).where(
+            Report.id == report_id,
+            Report.phone == phone,
+            Report.is_published == True
+        )
+    )).scalars().first()
+
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    return report
+
+
+@router.post("/upload")
+def upload_report(
+    phone: Annotated[Phone, Form()],
+    publish: bool = Form(True),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    path, sha256 = save_file(db, file)
+
+    report = Report(
+        phone=phone,
+        file_path=path,
+        file_sha256=sha256,
+        is_published=publish
+    )
+    db.add(report)
     db.commit()
-    print("Report OTP:", otp)
+
+    return {"report_id": report.id}
+
+
+@router.post("/send-otp")
+async def send_otp(phone: Phone):
+    await issue_otp(phone, PURPOSE_REPORT)
     return {"message": "OTP sent"}
 
 
 
 @router.post("/download")
-def download_report(
-    phone: str,
+async def download_report(
+    request: Request,
+    phone: Phone,
     otp: int,
     report_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    otp_record = db.query(ReportOTP).filter(
-        ReportOTP.phone == phone,
-        ReportOTP.otp == otp,
-        ReportOTP.is_used == 0,
-        ReportOTP.expires_at >= datetime.utcnow()
-    ).first()
-
-    if not otp_record:
-        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
+    report = await _otp_checked_report(phone, otp, report_id, db)
+    return _report_response(request, report)
+
+
+@router.post("/download-link")
+async def report_download_link(
+    phone: Phone,
+    otp: int,
+    report_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    report = await _otp_checked_report(phone, otp, report_id, db)
+    expires, signature = sign_report_url(report.id, REPORT_URL_TTL_SECONDS)
 
-    report = db.query(Report).filter(
-        Report.id == report_id,
-        Report.phone == phone
-    ).first()
+    return {
+        "url": f"{router.prefix}/files/{report.id}?expires={expires}&sig={signature}",
+        "expires": expires
+    }
+
+
+@router.get("/files/{report_id}")
+async def get_report_file(
+    request: Request,
+    report_id: int,
+    expires: int,
+    sig: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not verify_report_signature(report_id, expires, sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired link")
 
+    report = await db.get(Report, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
 
-    otp_record.is_used = 1
-    db.commit()
+    return _report_response(request, report)
 
-    return FileResponse(
-        report.file_path,
-        filename="report.pdf",
-        media_type="application/pdf"
+
+@router.get("/")
+async def list_reports(
+    phone: Phone | None = None,
+    cursor: str | None = None,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user)
+):
+    """
+    Published reports for a patient, newest first. Patients always get their
+    own; admins (front desk) pass the patient's phone.
+    """
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be 1-100")
+
+    if user["role"] == "ADMIN":
+        if phone is None:
+            raise HTTPException(status_code=400, detail="phone is required")
+    else:
+        phone = (await db.execute(
+            select(User.phone).where(User.id == user["user_id"])
+        )).scalar()
+        if phone is None:
+            raise HTTPException(status_code=404, detail="User not found")
+
+    # Keyset on (created_at, id) within the phone, matching ix_reports_phone_created;
+    # only metadata columns, the files are never touched
+    query = select(Report.id, Report.created_at, Report.file_sha256).where(
+        Report.phone == phone,
+        Report.is_published == True
     )
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Report.created_at, Report.id) < tuple_(created_at, last_id)
+        )
+
+    rows = (await db.execute(
+        query.order_by(
+            Report.created_at.desc(),
+            Report.id.desc()
+        ).limit(limit + 1)
+    )).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {
+        "phone": phone,
+        "reports": [
+            {
+                "report_id": r.id,
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+                "sha256": r.file_sha256,
+            }
+            for r in rows
+        ],
+        "next_cursor": next_cursor
+    }
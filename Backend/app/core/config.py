@@ -4,5 +4,93 @@ import os
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+
+
+def _async_url(url: str | None) -> str | None:
+    if not url:
+        return url
+    for sync_prefix, async_prefix in (
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+# Connection pool, per engine and per uvicorn worker. Size it so that
+# workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Database mode of the routers that take get_async_db: "true" awaits an
+# async driver (asyncpg/aiosqlite), "false" runs the same endpoints on the
+# sync engine with each call in the threadpool (no async driver needed)
+DB_ASYNC = os.getenv("DB_ASYNC", "true").lower() in ("1", "true", "yes")
+# Used by the async routers; derived from DATABASE_URL unless set explicitly
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
 JWT_SECRET = os.getenv("JWT_SECRET", "secret")
 JWT_ALGORITHM = "HS256"
+# "jose" (python-jose) or "pyjwt" (optional, faster); same tokens either way
+JWT_BACKEND = os.getenv("JWT_BACKEND", "jose")
+# Verified tokens kept in each worker's LRU cache; 0 disables caching
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "4096"))
+# Upper bound on how long a role change/revocation takes to reach every worker
+TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "5"))
+
+# Compiled commission rules are rebuilt at least this often so that rules
+# created through another worker process are picked up
+COMMISSION_RULE_CACHE_SECONDS = int(os.getenv("COMMISSION_RULE_CACHE_SECONDS", "60"))
+
+# "sql" shares OTPs between workers through the report_otps table,
+# "memory" keeps them in-process (single worker / development only)
+OTP_BACKEND = os.getenv("OTP_BACKEND", "sql")
+OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", "300"))
+OTP_MAX_ENTRIES = int(os.getenv("OTP_MAX_ENTRIES", "100000"))
+OTP_PURGE_INTERVAL_SECONDS = int(os.getenv("OTP_PURGE_INTERVAL_SECONDS", "300"))
+OTP_PURGE_BATCH_SIZE = int(os.getenv("OTP_PURGE_BATCH_SIZE", "1000"))
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Blob files without a stored_files row are only deleted (python -m
+# app.services.blob_gc) once older than this, so in-flight uploads survive
+BLOB_GC_MIN_AGE_SECONDS = int(os.getenv("BLOB_GC_MIN_AGE_SECONDS", "3600"))
+
+# Signed report download links (GET /reports/files/{id})
+REPORT_URL_SECRET = os.getenv("REPORT_URL_SECRET", JWT_SECRET)
+REPORT_URL_TTL_SECONDS = int(os.getenv("REPORT_URL_TTL_SECONDS", "300"))
+# When set (e.g. "/protected-uploads/"), report bytes are handed to nginx via
+# X-Accel-Redirect instead of being sent by the Python worker
+REPORT_ACCEL_REDIRECT_PREFIX = os.getenv("REPORT_ACCEL_REDIRECT_PREFIX")
+
+# Attendance kiosks: "device_id:key,device_id:key". /attendance/kiosk-sync
+# requires the calling device's key in the X-Kiosk-Key header
+KIOSK_DEVICE_KEYS = dict(
+    pair.strip().split(":", 1)
+    for pair in os.getenv("KIOSK_DEVICE_KEYS", "").split(",")
+    if ":" in pair
+)
+
+# Per-request SQL profiling (development): always on with SQL_PROFILE=1, or
+# per request via "X-SQL-Profile: 1" when SQL_PROFILE_ALLOW_HEADER=1
+SQL_PROFILE = os.getenv("SQL_PROFILE", "").lower() in ("1", "true", "yes")
+SQL_PROFILE_ALLOW_HEADER = os.getenv("SQL_PROFILE_ALLOW_HEADER", "").lower() in ("1", "true", "yes")
+SQL_PROFILE_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_PROFILE_N_PLUS_ONE_THRESHOLD", "3"))
+
+# Country code assumed for phone numbers entered without one
+DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_COUNTRY_CODE", "91")
+
+# Lab instrument report ingestion (python -m app.services.report_ingest)
+REPORT_SPOOL_DIR = os.getenv("REPORT_SPOOL_DIR", "spool/reports")
+REPORT_INGEST_POLL_SECONDS = float(os.getenv("REPORT_INGEST_POLL_SECONDS", "5"))
+REPORT_INGEST_BATCH_SIZE = int(os.getenv("REPORT_INGEST_BATCH_SIZE", "100"))
+# Files modified more recently than this may still be being written
+REPORT_INGEST_SETTLE_SECONDS = float(os.getenv("REPORT_INGEST_SETTLE_SECONDS", "2"))
+REPORT_INGEST_PUBLISH = os.getenv("REPORT_INGEST_PUBLISH", "true").lower() in ("1", "true", "yes")
+
+# Startup check that the database is at the latest Alembic revision:
+# "error" refuses to start, "warn" only logs, "off" skips the check
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "error").lower()
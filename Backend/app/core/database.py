@@ -1,14 +1,226 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import DATABASE_URL
+from contextlib import asynccontextmanager
 
-engine = create_engine(DATABASE_URL)
+from sqlalchemy import DateTime, create_engine, exc, make_url
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
+from app.core.config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DB_ASYNC,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
+from app.core.pool_metrics import instrument_engine, record_timeout
+
+
+# dialect_insert (ON CONFLICT upserts) supports only these backends
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+
+
+def _check_dialect(url: str) -> None:
+    name = make_url(url).get_backend_name()
+    if name not in SUPPORTED_DIALECTS:
+        raise RuntimeError(
+            f"DATABASE_URL uses {name}; only PostgreSQL and SQLite are "
+            "supported (inserts rely on ON CONFLICT upserts)"
+        )
+
+
+def _pool_options(url: str, name: str) -> dict:
+    # SQLite (local runs) keeps SQLAlchemy's default pool for its driver
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+
+    return {
+        "pool_logging_name": name,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+_check_dialect(DATABASE_URL)
+engine = create_engine(
+    DATABASE_URL, **_pool_options(DATABASE_URL, "sync")
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False)
 Base = declarative_base()
 
+
+class ThreadedSession:
+    """
+    AsyncSession-compatible wrapper around a sync Session, used when
+    DB_ASYNC is off: each database call runs in the threadpool on the sync
+    engine, so the async endpoints need no async driver.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def get_bind(self):
+        return self.sync_session.get_bind()
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        result = await self.execute(*args, **kwargs)
+        rows = await run_in_threadpool(result.all)
+
+        async def iterate():
+            for row in rows:
+                yield row
+
+        return iterate()
+
+    async def get(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        # SAVEPOINT is issued here; leaving the block releases or rolls it back
+        transaction = await run_in_threadpool(self.sync_session.begin_nested)
+        try:
+            yield transaction
+        except BaseException as exc:
+            if not await run_in_threadpool(
+                transaction.__exit__, type(exc), exc, exc.__traceback__
+            ):
+                raise
+        else:
+            await run_in_threadpool(transaction.__exit__, None, None, None)
+
+
+# Async engine for the request-heavy routers (auth, bookings, reports,
+# attendance); they await the database instead of holding a threadpool slot.
+# With DB_ASYNC off the same routers run on the sync engine instead.
+async_engine = None
+AsyncSessionLocal = None
+# Same expiry behaviour as AsyncSessionLocal, so attribute access after a
+# commit never lazy-loads from the event loop
+ThreadedSessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        **_pool_options(ASYNC_DATABASE_URL, "async")
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+ASYNC_POOL_NAME = "async" if DB_ASYNC else "sync"
+
+for _engine, _name in (
+    (engine, "sync"),
+    (async_engine.sync_engine if async_engine else None, "async"),
+):
+    # AsyncAdaptedQueuePool is a QueuePool too; SQLite's pools are not sized
+    if _engine is not None and isinstance(_engine.pool, QueuePool):
+        instrument_engine(_engine, _name)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
+    except exc.TimeoutError:
+        record_timeout("sync")
+        raise
     finally:
         db.close()
+
+
+def async_session():
+    """
+    Session for async code in either mode: an AsyncSession, or a
+    ThreadedSession on the sync engine when DB_ASYNC is off. Use as
+    `async with async_session() as db`.
+    """
+    if AsyncSessionLocal is not None:
+        return AsyncSessionLocal()
+    return ThreadedSession(ThreadedSessionLocal())
+
+
+async def get_async_db():
+    async with async_session() as db:
+        try:
+            yield db
+        except exc.TimeoutError:
+            record_timeout(ASYNC_POOL_NAME)
+            raise
+
+
+def dialect_insert(db):
+    """
+    Returns the dialect-specific `insert` construct for the session's
+    database, which supports on_conflict_do_nothing/do_update (PostgreSQL
+    in production, SQLite for local runs; other databases are rejected at
+    startup by _check_dialect).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    return insert
+
+
+class utc_now(FunctionElement):
+    """
+    Current UTC time as a naive timestamp, for server defaults next to
+    Python-side datetime.utcnow defaults (now() is in the session timezone).
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utc_now)
+def _utc_now_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utc_now, "postgresql")
+def _utc_now_postgresql(element, compiler, **kw):
+    return "timezone('utc', now())"
+
+
+@compiles(utc_now, "sqlite")
+def _utc_now_sqlite(element, compiler, **kw):
+    # Same text format SQLAlchemy stores DateTime in, so defaulted and
+    # bound timestamps compare correctly as strings (e.g. in keysets)
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
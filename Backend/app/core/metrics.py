@@ -0,0 +1,237 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.pool_metrics import pool_stats
+
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _label_str(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, v in self._values.items():
+                lines.append(f"{self.name}{_label_str(self.labels, values)} {v}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *label_values, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help: str, labels: tuple = (), buckets=LATENCY_BUCKETS
+    ):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(label_values)
+            if data is None:
+                data = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            data[index] += 1
+            data[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, data in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), data):
+                    cumulative += count
+                    labels = _label_str(self.labels, values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _label_str(self.labels, values)
+                lines.append(f"{self.name}_sum{labels} {data[-1]}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ("method", "route", "status")
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served")
+REQUEST_DB_QUERIES = Counter(
+    "http_request_db_queries_total",
+    "SQL statements executed while serving requests",
+    ("method", "route"),
+)
+REQUEST_DB_SECONDS = Counter(
+    "http_request_db_seconds_total",
+    "Time spent in SQL statements while serving requests",
+    ("method", "route"),
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement latency"
+)
+
+METRICS = (
+    REQUESTS, REQUEST_LATENCY, IN_FLIGHT,
+    REQUEST_DB_QUERIES, REQUEST_DB_SECONDS, DB_QUERY_LATENCY,
+)
+
+
+class RequestDBStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set by MetricsMiddleware for the duration of a request. The object is
+# mutated in place, so queries run in threadpool workers (sync endpoints)
+# or greenlets (AsyncSession) are still attributed to the request.
+current_request_db: ContextVar[RequestDBStats | None] = ContextVar(
+    "current_request_db", default=None
+)
+
+
+# Called as observer(statement, seconds) after every SQL statement; lets
+# other instrumentation (e.g. the SQL profiler) reuse these timing hooks
+statement_observers: list = []
+
+
+# The start time lives on the statement's ExecutionContext, so a statement
+# that raises can't leave a stale entry behind on the pooled connection
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    DB_QUERY_LATENCY.observe(elapsed)
+
+    stats = current_request_db.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+    for observer in statement_observers:
+        observer(statement, elapsed)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware wrapping) recording latency,
+    status codes, in-flight requests and DB usage per route template.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+        db_stats = RequestDBStats()
+        token = current_request_db.set(db_stats)
+        IN_FLIGHT.inc()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            current_request_db.reset(token)
+
+            route = scope.get("route")
+            # Route templates keep label cardinality bounded
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+
+            REQUESTS.inc(method, path, str(status))
+            REQUEST_LATENCY.observe(elapsed, method, path)
+            if db_stats.queries:
+                REQUEST_DB_QUERIES.inc(method, path, amount=db_stats.queries)
+                REQUEST_DB_SECONDS.inc(method, path, amount=db_stats.seconds)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+
+    pool_metrics = (
+        ("checked_out", "db_pool_checked_out", "gauge",
+         "Connections currently checked out"),
+        ("overflow", "db_pool_overflow", "gauge",
+         "Overflow connections currently open"),
+        ("checkouts", "db_pool_checkouts_total", "counter",
+         "Connection checkouts"),
+        ("checkout_timeouts", "db_pool_checkout_timeouts_total", "counter",
+         "Checkouts that timed out waiting for a connection"),
+        ("overflow_checkouts", "db_pool_overflow_checkouts_total", "counter",
+         "Checkouts that opened an overflow connection"),
+        ("connect_max_ms", "db_pool_connect_max_seconds", "gauge",
+         "Longest time to open a new connection"),
+        ("hold_max_ms", "db_pool_hold_max_seconds", "gauge",
+         "Longest time a connection stayed checked out"),
+    )
+    pools = pool_stats()
+    for key, name, kind, help in pool_metrics:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for pool, stats in pools.items():
+            value = stats[key]
+            if value is None:
+                continue
+            if key.endswith("_ms"):
+                value /= 1000
+            lines.append(f'{name}{{pool="{pool}"}} {value}')
+
+    return "\n".join(lines) + "\n"
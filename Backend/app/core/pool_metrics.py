@@ -0,0 +1,131 @@
+import threading
+import time
+
+from sqlalchemy import event
+
+
+class PoolStats:
+    """
+    Counters for one engine's connection pool, fed by pool events.
+
+    Pool events have no hook before a checkout starts waiting, so instead of
+    queue wait this records how long new connections take to open (connect
+    latency) and how long connections stay checked out (hold time), which
+    together with in-use/overflow counts is what pool sizing needs.
+    """
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self.pool = pool
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.overflow_checkouts = 0
+        self.connects = 0
+        self.connect_total = 0.0
+        self.connect_max = 0.0
+        self.checkins = 0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.last_overflow = 0
+
+    def record_checkout(self, overflow: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            # Overflow only grows when a checkout finds the pool exhausted
+            if overflow > self.last_overflow:
+                self.overflow_checkouts += 1
+            self.last_overflow = overflow
+
+    def record_checkin(self, held: float, overflow: int) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.hold_total += held
+            self.hold_max = max(self.hold_max, held)
+            self.last_overflow = overflow
+
+    def record_connect(self, seconds: float) -> None:
+        with self._lock:
+            self.connects += 1
+            self.connect_total += seconds
+            self.connect_max = max(self.connect_max, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        with self._lock:
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": _overflow(pool),
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "connections_opened": self.connects,
+                "connect_avg_ms": (
+                    self.connect_total / self.connects * 1000
+                    if self.connects else 0.0
+                ),
+                "connect_max_ms": self.connect_max * 1000,
+                "hold_avg_ms": (
+                    self.hold_total / self.checkins * 1000
+                    if self.checkins else 0.0
+                ),
+                "hold_max_ms": self.hold_max * 1000,
+            }
+
+
+POOL_STATS: dict[str, PoolStats] = {}
+
+
+def _overflow(pool) -> int:
+    # QueuePool.overflow() counts up from -pool_size until the pool is full
+    return max(pool.overflow(), 0)
+
+
+def instrument_engine(engine, name: str) -> PoolStats:
+    """
+    Registers stats for `engine`'s pool under `name` and attaches the
+    connect/checkout/checkin listeners to the engine. Listeners on the
+    engine stay in place across pool.recreate().
+    """
+    stats = POOL_STATS[name] = PoolStats(name, engine.pool)
+
+    @event.listens_for(engine, "do_connect")
+    def on_do_connect(dialect, conn_rec, cargs, cparams):
+        conn_rec.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        started = connection_record.info.pop("connect_started", None)
+        if started is not None:
+            stats.record_connect(time.perf_counter() - started)
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.pool = engine.pool
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        stats.record_checkout(_overflow(engine.pool))
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            stats.record_checkin(
+                time.perf_counter() - checked_out_at, _overflow(engine.pool)
+            )
+
+    return stats
+
+
+def record_timeout(name: str) -> None:
+    stats = POOL_STATS.get(name)
+    if stats is not None:
+        stats.record_timeout()
+
+
+def pool_stats() -> dict:
+    return {name: stats.snapshot() for name, stats in POOL_STATS.items()}
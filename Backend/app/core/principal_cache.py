@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# session.info key for version bumps waiting for their transaction to commit
+PENDING_VERSIONS = "pending_token_versions"
+
+
+class TokenVersionCache:
+    """
+    In-memory user_id -> token_version map used to reject tokens issued
+    before a role change or revocation.
+
+    Only users whose version was ever bumped are held. The map is kept
+    current by a delta query on users.updated_at, run at most once every
+    `refresh_seconds` by whichever request finds it stale, so a change made
+    through any worker applies everywhere within that interval.
+    """
+
+    # Re-read rows slightly older than the watermark so transactions that
+    # commit late with an earlier updated_at are not missed
+    OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, session_factory, refresh_seconds: float):
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self._versions: dict[int, int] = {}
+        self._watermark: datetime | None = None
+        self._refreshed_at = float("-inf")
+        self._refresh_lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        query = select(User.id, User.token_version, User.updated_at)
+        if self._watermark is None:
+            query = query.where(User.token_version > 0)
+        else:
+            query = query.where(User.updated_at > self._watermark - self.OVERLAP)
+
+        db = self.session_factory()
+        try:
+            rows = db.execute(query).all()
+        finally:
+            db.close()
+
+        for user_id, version, updated_at in rows:
+            if version:
+                self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+            if updated_at and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+
+        if self._watermark is None:
+            self._watermark = datetime.utcnow()
+
+    def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+
+        # One thread refreshes; the others keep using the current map
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._refresh()
+        except Exception:
+            logger.exception("Token version refresh failed")
+        finally:
+            # Also after a failure, so a database outage is retried once per
+            # interval instead of on every request
+            self._refreshed_at = time.monotonic()
+            self._refresh_lock.release()
+
+    def current_version(self, user_id: int) -> int:
+        self._maybe_refresh()
+        return self._versions.get(user_id, 0)
+
+    def note_version(self, user_id: int, version: int) -> None:
+        """
+        Applies a bump made by this worker immediately.
+        """
+        self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+
+    def note_version_on_commit(self, db: Session, user_id: int, version: int) -> None:
+        """
+        Applies a bump made in `db`'s transaction once it commits; dropped if
+        the transaction rolls back, since the cache never lowers a version.
+        """
+        db.info.setdefault(PENDING_VERSIONS, []).append((self, user_id, version))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_versions(session):
+    for cache, user_id, version in session.info.pop(PENDING_VERSIONS, ()):
+        cache.note_version(user_id, version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_versions(session):
+    session.info.pop(PENDING_VERSIONS, None)
@@ -0,0 +1,121 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from app.core.config import (
+    SQL_PROFILE,
+    SQL_PROFILE_ALLOW_HEADER,
+    SQL_PROFILE_N_PLUS_ONE_THRESHOLD,
+)
+from app.core.metrics import statement_observers
+
+logger = logging.getLogger("app.sql_profile")
+
+PROFILE_HEADER = b"x-sql-profile"
+
+_WHITESPACE = re.compile(r"\s+")
+# "IN (?, ?, ?)" / "IN (%(p_1)s, %(p_2)s)" / "IN ($1, $2)" all become "IN (?)"
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+))*\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestProfile:
+    __slots__ = ("statements",)
+
+    def __init__(self):
+        self.statements: list[tuple[str, float]] = []
+
+    @property
+    def db_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        counts = Counter(statement_shape(s) for s, _ in self.statements)
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+
+current_profile: ContextVar[RequestProfile | None] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def _record_statement(statement: str, seconds: float) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.statements.append((statement, seconds))
+
+
+# Timed by the metrics cursor hooks rather than a second pair of listeners
+statement_observers.append(_record_statement)
+
+
+class SQLProfilingMiddleware:
+    """
+    Development aid: when SQL_PROFILE is set, or SQL_PROFILE_ALLOW_HEADER is
+    set and the request carries `X-SQL-Profile: 1`, logs every statement the
+    request ran with its duration, warns about statement shapes repeated
+    SQL_PROFILE_N_PLUS_ONE_THRESHOLD times or more (N+1 queries), and adds
+    a Server-Timing header for browser devtools.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _enabled(self, scope) -> bool:
+        if SQL_PROFILE:
+            return True
+        if not SQL_PROFILE_ALLOW_HEADER:
+            return False
+        return any(
+            name == PROFILE_HEADER and value in (b"1", b"true")
+            for name, value in scope["headers"]
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._enabled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                db_ms = profile.db_seconds * 1000
+                timing = (
+                    f'db;dur={db_ms:.1f};desc="{len(profile.statements)} queries", '
+                    f"app;dur={total_ms - db_ms:.1f}, total;dur={total_ms:.1f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            self._log(scope, profile, time.perf_counter() - start)
+
+    def _log(self, scope, profile: RequestProfile, elapsed: float) -> None:
+        route = getattr(scope.get("route"), "path", scope["path"])
+        logger.info(
+            "%s %s: %d queries, %.1f ms in DB, %.1f ms total",
+            scope["method"], route, len(profile.statements),
+            profile.db_seconds * 1000, elapsed * 1000,
+        )
+        for statement, seconds in profile.statements:
+            logger.info("  %.2f ms  %s", seconds * 1000, _WHITESPACE.sub(" ", statement))
+
+        for shape, count in profile.repeated_shapes(SQL_PROFILE_N_PLUS_ONE_THRESHOLD):
+            logger.warning(
+                "Possible N+1 in %s %s: %d x %s",
+                scope["method"], route, count, shape,
+            )
@@ -0,0 +1,60 @@
+import logging
+import os
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import SCHEMA_CHECK
+from app.core.database import async_engine, engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "alembic.ini",
+)
+
+
+def expected_revision() -> str | None:
+    return ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_current_head()
+
+
+def _current_revision(sync_conn) -> str | None:
+    return MigrationContext.configure(sync_conn).get_current_revision()
+
+
+def _sync_current_revision() -> str | None:
+    with engine.connect() as conn:
+        return _current_revision(conn)
+
+
+async def check_schema_version():
+    """
+    Compares the database's alembic_version with the latest migration.
+
+    This is a single-row read, so workers start without reflecting the
+    schema; migrations themselves run as a deploy step (alembic upgrade head).
+    """
+    if SCHEMA_CHECK == "off":
+        return
+
+    expected = expected_revision()
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            current = await conn.run_sync(_current_revision)
+    else:
+        current = await run_in_threadpool(_sync_current_revision)
+
+    if current == expected:
+        return
+
+    message = (
+        f"Database schema is at revision {current or '(none)'} but the code "
+        f"expects {expected}; run `alembic upgrade head`"
+    )
+    if SCHEMA_CHECK == "warn":
+        logger.warning(message)
+    else:
+        raise RuntimeError(message)
@@ -1,8 +1,96 @@
+import hashlib
+import hmac
+import time
 from datetime import datetime, timedelta
-from jose import jwt
-from app.core.config import JWT_SECRET, JWT_ALGORITHM
+from jose import jwt, JWTError
+from app.core.config import (
+    JWT_SECRET,
+    JWT_ALGORITHM,
+    JWT_BACKEND,
+    JWT_CACHE_SIZE,
+    KIOSK_DEVICE_KEYS,
+    REPORT_URL_SECRET,
+)
+from app.core.token_cache import VerifiedTokenCache
+
+
+class InvalidTokenError(Exception):
+    pass
+
 
 def create_access_token(data: dict):
     payload = data.copy()
     payload["exp"] = datetime.utcnow() + timedelta(days=1)
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def _decode_with_jose(token: str) -> dict:
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except JWTError as e:
+        raise InvalidTokenError(str(e))
+
+
+def _decode_with_pyjwt(token: str) -> dict:
+    # Optional dependency: pip install pyjwt, then JWT_BACKEND=pyjwt
+    import jwt as pyjwt
+
+    try:
+        return pyjwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except pyjwt.PyJWTError as e:
+        raise InvalidTokenError(str(e))
+
+
+_DECODERS = {
+    "jose": _decode_with_jose,
+    "pyjwt": _decode_with_pyjwt,
+}
+
+if JWT_BACKEND not in _DECODERS:
+    raise RuntimeError(f"Unknown JWT_BACKEND: {JWT_BACKEND}")
+
+_decode = _DECODERS[JWT_BACKEND]
+token_cache = VerifiedTokenCache(JWT_CACHE_SIZE)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verifies a bearer token and returns its claims. Tokens seen before are
+    answered from token_cache until they expire; only successful
+    verifications are cached.
+    """
+    key = token_cache.key(token)
+
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = _decode(token)
+        token_cache.put(key, payload)
+
+    # Callers get their own copy so the cached claims can't be mutated
+    return dict(payload)
+
+
+def _report_signature(report_id: int, expires: int) -> str:
+    message = f"{report_id}:{expires}".encode()
+    return hmac.new(REPORT_URL_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign_report_url(report_id: int, ttl_seconds: int) -> tuple[int, str]:
+    """
+    Returns (expires, signature) for a time-limited report download link.
+    """
+    expires = int(time.time()) + ttl_seconds
+    return expires, _report_signature(report_id, expires)
+
+
+def verify_report_signature(report_id: int, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_report_signature(report_id, expires), signature)
+
+
+def verify_kiosk_key(device_id: str, key: str | None) -> bool:
+    expected = KIOSK_DEVICE_KEYS.get(device_id)
+    if not expected or not key:
+        return False
+    return hmac.compare_digest(expected, key)
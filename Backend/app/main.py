@@ -1,5 +1,7 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
-from app.core.database import Base, engine
 from app.api.auth.router import router as auth
 from app.api.bookings.router import router as bookings
 from app.api.prescriptions.router import router as prescriptions
@@ -7,12 +9,32 @@ from app.api.reports.router import router as reports
 from app.api.payroll.router import router as payroll
 from app.api.inventory.router import router as inventory
 from app.api.attendance.router import router as attendance_router
+from app.api.attendance.admin_router import router as attendance_admin_router
 from app.api.admin.router import router as admin_router
+from app.api.metrics.router import router as metrics_router
+from app.core.database import async_engine
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import SQLProfilingMiddleware
+from app.core.schema import check_schema_version
+from app.utils.otp import purge_otps_periodically
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await check_schema_version()
+    otp_purge = asyncio.create_task(purge_otps_periodically())
+    yield
+    otp_purge.cancel()
+    with suppress(asyncio.CancelledError):
+        await otp_purge
+    # Close pooled async connections while their event loop is still running
+    if async_engine is not None:
+        await async_engine.dispose()
 
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Diagnostic Center Backend")
+app = FastAPI(title="Diagnostic Center Backend", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(SQLProfilingMiddleware)
 
 app.include_router(auth)
 app.include_router(bookings)
@@ -21,4 +43,6 @@ app.include_router(reports)
 app.include_router(payroll)
 app.include_router(inventory)
 app.include_router(attendance_router)
+app.include_router(attendance_admin_router)
 app.include_router(admin_router)
+app.include_router(metrics_router)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, Date, Time, String, ForeignKey
+from sqlalchemy import Column, Integer, Date, Time, String, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        # One row per employee per day; also serves (employee_id, date) range scans
+        UniqueConstraint("employee_id", "date", name="uq_attendance_employee_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
@@ -1,11 +1,12 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey
-from app.core.database import Base
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime
+from datetime import datetime
+from app.core.database import Base, utc_now
 
 class Booking(Base):
     __tablename__ = "bookings"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False, index=True)
 
     doctor_id = Column(Integer, nullable=True)
     test_id = Column(Integer, nullable=True)
@@ -16,3 +17,4 @@ class Booking(Base):
     payment_mode = Column(String, nullable=False)     # CASH / ONLINE
 
     home_service = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=utc_now(), index=True)
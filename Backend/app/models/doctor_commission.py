@@ -1,14 +1,22 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy import Column, Integer, Float, String, DateTime, Index
 from datetime import datetime
-from app.core.database import Base
+from app.core.database import Base, utc_now
 
 class DoctorCommission(Base):
     __tablename__ = "doctor_commissions"
+    __table_args__ = (
+        Index("ix_doctor_commissions_doctor_created", "doctor_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     doctor_id = Column(Integer)
-    booking_id = Column(Integer)
+    # One commission per booking (migration 0004 archived the extras);
+    # compute_commissions relies on it for reruns
+    booking_id = Column(Integer, unique=True, index=True)
     test_amount = Column(Float)
     commission_percentage = Column(Float)
     commission_amount = Column(Float)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # NOT NULL (migration 0005): the commission report's (created_at, id)
+    # keyset cursor can't encode a NULL
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow,
+                        server_default=utc_now())
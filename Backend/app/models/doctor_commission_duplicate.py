@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+class DoctorCommissionDuplicate(Base):
+    __tablename__ = "doctor_commission_duplicates"
+
+    # Extra commissions for a booking that migration 0004 moved out of
+    # doctor_commissions before booking_id became unique; kept for review
+    id = Column(Integer, primary_key=True)
+    doctor_id = Column(Integer)
+    booking_id = Column(Integer, index=True)
+    test_amount = Column(Float)
+    commission_percentage = Column(Float)
+    commission_amount = Column(Float)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Float, Index
+from app.core.database import Base
+
+class DoctorCommissionMonthly(Base):
+    __tablename__ = "doctor_commission_monthly"
+    __table_args__ = (
+        Index("ix_doctor_commission_monthly_leaderboard", "year", "month", "total"),
+    )
+
+    # Rollup of doctor_commissions, maintained by app.services.commission_rollup
+    doctor_id = Column(Integer, primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
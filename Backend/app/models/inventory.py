@@ -1,10 +1,23 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint, text
+from datetime import datetime
 from app.core.database import Base
 
 class Inventory(Base):
     __tablename__ = "inventory"
+    __table_args__ = (
+        UniqueConstraint("item_name", name="uq_inventory_item_name"),
+        # Only the (few) items at or below their reorder level are indexed
+        Index(
+            "ix_inventory_low_stock",
+            "quantity",
+            postgresql_where=text("quantity <= reorder_level"),
+            sqlite_where=text("quantity <= reorder_level"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
-    item_name = Column(String)
+    item_name = Column(String, nullable=False)
     type = Column(String)  # INSTRUMENT | MEDICINE
-    quantity = Column(Integer)
+    quantity = Column(Integer, nullable=False, default=0)
+    reorder_level = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+from app.core.database import Base
+
+class KioskPunch(Base):
+    __tablename__ = "kiosk_punches"
+    __table_args__ = (
+        # Kiosks number their punches; a replayed buffer is deduped on this
+        UniqueConstraint("device_id", "sequence", name="uq_kiosk_punches_device_sequence"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    device_id = Column(String, nullable=False)
+    sequence = Column(Integer, nullable=False)
+
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+    kind = Column(String, nullable=False)  # ENTRY / EXIT
+    punched_at = Column(DateTime, nullable=False)
+
+    received_at = Column(DateTime, default=datetime.utcnow)
@@ -6,6 +6,6 @@ class Prescription(Base):
     __tablename__ = "prescriptions"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer)
+    user_id = Column(Integer, index=True)
     file_path = Column(String)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
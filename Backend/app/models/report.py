@@ -1,14 +1,23 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from datetime import datetime
-from app.core.database import Base
+from app.core.database import Base, utc_now
 
 class Report(Base):
     __tablename__ = "reports"
+    __table_args__ = (
+        # Serves both the per-patient listing (newest first, keyset on
+        # created_at, id) and plain phone lookups via its leading column
+        Index("ix_reports_phone_created", "phone", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     phone = Column(String)
     file_path = Column(String, nullable=False)
+    file_sha256 = Column(String(64), index=True)
 
     is_published = Column(Boolean, default=False)  # ✅ ADD THIS
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # NOT NULL with a server default: raw inserts get a timestamp too, and the
+    # listing's (created_at, id) keyset never sees NULLs
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow,
+                        server_default=utc_now())
 
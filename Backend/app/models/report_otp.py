@@ -1,11 +1,22 @@
-from sqlalchemy import Column, Integer, String,DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, text
 from app.core.database import Base
 
 class ReportOTP(Base):
     __tablename__ = "report_otps"
+    __table_args__ = (
+        # Only unused OTPs are ever looked up, so keep the index to those
+        Index(
+            "ix_report_otps_active",
+            "phone",
+            "otp",
+            postgresql_where=text("is_used = 0"),
+            sqlite_where=text("is_used = 0"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
-    phone = Column(String, index=True)
+    purpose = Column(String, nullable=False, default="REPORT")  # LOGIN / REPORT
+    phone = Column(String)
     otp = Column(Integer)
     expires_at = Column(DateTime)
-    is_used = Column(Integer, default=0)
\ No newline at end of file
+    is_used = Column(Integer, default=0)
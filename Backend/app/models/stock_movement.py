@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.core.database import Base
+
+class StockMovement(Base):
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        Index("ix_stock_movements_item_created", "item_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("inventory.id"), nullable=False)
+    kind = Column(String, nullable=False)  # RECEIPT | CONSUMPTION | IMPORT
+
+    # Signed change and the item's quantity right after it
+    quantity = Column(Integer, nullable=False)
+    balance_after = Column(Integer, nullable=False)
+
+    user_id = Column(Integer, nullable=True)
+    note = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+class StoredFile(Base):
+    __tablename__ = "stored_files"
+
+    # Content-addressed blob under uploads/blobs/ab/cd/<sha256>
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+
+    # Number of prescriptions/reports pointing at this blob
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
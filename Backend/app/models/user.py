@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from datetime import datetime
 from app.core.database import Base
 
 class User(Base):
@@ -9,3 +10,9 @@ class User(Base):
     phone = Column(String, unique=True)
     role = Column(String)  # PATIENT | DOCTOR | ADMIN
     is_active = Column(Boolean, default=True)
+
+    # Bumped on role change / revocation; tokens carrying an older "ver" are rejected
+    token_version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
+    )
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel, Field, field_validator
+from app.utils.date_range import MIN_YEAR, MAX_YEAR
+
+class KioskPunchIn(BaseModel):
+    sequence: int
+    employee_id: int
+    kind: Literal["ENTRY", "EXIT"]
+    punched_at: datetime
+
+    @field_validator("punched_at")
+    @classmethod
+    def to_local_naive(cls, value: datetime) -> datetime:
+        # Attendance times are naive server-local, like /entry and /exit
+        if value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+class KioskSyncRequest(BaseModel):
+    device_id: str = Field(min_length=1)
+    punches: list[KioskPunchIn] = Field(max_length=1000)
+
+class BulkApproveRequest(BaseModel):
+    # Either explicit ids, or every record of a month in one of `statuses`
+    ids: list[int] | None = Field(default=None, max_length=5000)
+    month: int | None = Field(default=None, ge=1, le=12)
+    year: int | None = Field(default=None, ge=MIN_YEAR, le=MAX_YEAR)
+    statuses: list[Literal["PENDING", "AUTO"]] = ["PENDING", "AUTO"]
+    approve: bool = True
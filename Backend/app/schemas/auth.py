@@ -1,5 +1,6 @@
 from pydantic import BaseModel
+from app.utils.phone import Phone
 
 class VerifyOTPRequest(BaseModel):
-    phone: str
+    phone: Phone
     otp: int
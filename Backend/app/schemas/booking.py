@@ -1,8 +1,9 @@
 from pydantic import BaseModel
 from typing import Optional
+from app.utils.phone import Phone
 
 class BookingCreate(BaseModel):
-    phone: str
+    phone: Phone
     doctor_id: Optional[int] = None
     test_id: Optional[int] = None
     package_id: Optional[int] = None
@@ -0,0 +1,52 @@
+from array import array
+from datetime import date
+
+# One character per day in MonthMatrix rows
+STATUS_CODES = {
+    None: ".",
+    "PENDING": "P",
+    "AUTO": "U",
+    "APPROVED": "A",
+    "REJECTED": "R",
+}
+
+
+class MonthMatrix:
+    """
+    Employees x days of one month, kept as one status string and one
+    unsigned array of worked minutes per employee instead of ORM objects.
+    """
+    __slots__ = ("start", "days", "names", "statuses", "minutes")
+
+    def __init__(self, start: date, days: int):
+        self.start = start
+        self.days = days
+        self.names: dict[int, str] = {}
+        self.statuses: dict[int, bytearray] = {}
+        self.minutes: dict[int, array] = {}
+
+    def add_employee(self, employee_id: int, name: str | None):
+        self.names[employee_id] = name
+        self.statuses[employee_id] = bytearray(b"." * self.days)
+        self.minutes[employee_id] = array("H", bytes(2 * self.days))
+
+    def set(self, employee_id: int, day: date, status: str | None, worked_minutes: int | None):
+        i = (day - self.start).days
+        self.statuses[employee_id][i] = ord(STATUS_CODES.get(status, "?"))
+        self.minutes[employee_id][i] = max(0, min(worked_minutes or 0, 0xFFFF))
+
+    def as_dict(self) -> dict:
+        return {
+            "start": self.start.isoformat(),
+            "days": self.days,
+            "status_codes": {v: k for k, v in STATUS_CODES.items() if k},
+            "employees": [
+                {
+                    "employee_id": employee_id,
+                    "name": name,
+                    "status": self.statuses[employee_id].decode(),
+                    "worked_minutes": self.minutes[employee_id].tolist(),
+                }
+                for employee_id, name in self.names.items()
+            ],
+        }
@@ -0,0 +1,87 @@
+import logging
+import os
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import BLOB_GC_MIN_AGE_SECONDS
+from app.models.stored_file import StoredFile
+from app.utils.file_upload import BLOB_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def _unlink(path: str) -> bool:
+    try:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def collect_garbage(db: Session, min_age_seconds: float = BLOB_GC_MIN_AGE_SECONDS) -> dict:
+    """
+    Removes blobs nothing points at any more.
+
+    Rows whose ref_count dropped to 0 (release_blob) are deleted with a
+    conditional DELETE, so a concurrent store_blob that re-references the
+    content wins, and their files go with them. Files under BLOB_DIR with no
+    stored_files row were written by transactions that rolled back; they are
+    deleted once older than `min_age_seconds`, as are stale upload temp files.
+    """
+    counts = {"released": 0, "orphans": 0}
+
+    released = dict(db.execute(
+        delete(StoredFile)
+        .where(StoredFile.ref_count <= 0)
+        .returning(StoredFile.sha256, StoredFile.path)
+    ).all())
+    db.commit()
+
+    if released:
+        # Content stored again since the DELETE keeps its file
+        restored = set(db.execute(
+            select(StoredFile.sha256).where(StoredFile.sha256.in_(list(released)))
+        ).scalars())
+        counts["released"] = sum(
+            _unlink(path) for sha256, path in released.items() if sha256 not in restored
+        )
+
+    cutoff = time.time() - min_age_seconds
+    for directory, _, names in os.walk(BLOB_DIR):
+        candidates = {}
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                if os.stat(path).st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            if name.startswith(".upload-"):
+                counts["orphans"] += _unlink(path)
+            else:
+                candidates[name] = path
+
+        if not candidates:
+            continue
+        known = set(db.execute(
+            select(StoredFile.sha256).where(StoredFile.sha256.in_(list(candidates)))
+        ).scalars())
+        for sha256, path in candidates.items():
+            if sha256 not in known:
+                counts["orphans"] += _unlink(path)
+
+    return counts
+
+
+if __name__ == "__main__":
+    # python -m app.services.blob_gc
+    from app.core.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        logger.info("Blob GC: %s", collect_garbage(db))
+    finally:
+        db.close()
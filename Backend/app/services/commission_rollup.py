@@ -0,0 +1,97 @@
+from collections import defaultdict
+
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, insert, extract, func
+
+from app.core.database import dialect_insert
+from app.models.doctor_commission import DoctorCommission
+from app.models.doctor_commission_monthly import DoctorCommissionMonthly
+
+
+def apply_to_rollup(db: Session, commissions: list[dict]) -> None:
+    """
+    Adds freshly written DoctorCommission rows to doctor_commission_monthly.
+
+    Must run in the same transaction as the insert of `commissions` so the
+    rollup never drifts from the raw table.
+    """
+    buckets = defaultdict(lambda: [0.0, 0])
+
+    for c in commissions:
+        key = (c["doctor_id"], c["created_at"].year, c["created_at"].month)
+        buckets[key][0] += c["commission_amount"] or 0
+        buckets[key][1] += 1
+
+    if not buckets:
+        return
+
+    insert_ = dialect_insert(db)
+    stmt = insert_(DoctorCommissionMonthly).values([
+        {
+            "doctor_id": doctor_id,
+            "year": year,
+            "month": month,
+            "total": total,
+            "count": count,
+        }
+        for (doctor_id, year, month), (total, count) in buckets.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["doctor_id", "year", "month"],
+        set_={
+            "total": DoctorCommissionMonthly.total + stmt.excluded.total,
+            "count": DoctorCommissionMonthly.count + stmt.excluded.count,
+        },
+    )
+    db.execute(stmt)
+
+
+def rebuild_rollup(db: Session, doctor_id: int | None = None) -> int:
+    """
+    Recomputes the rollup from doctor_commissions (all doctors, or one).
+    Used for backfills and after manual edits to the raw table.
+    """
+    clear = delete(DoctorCommissionMonthly)
+    source = select(
+        DoctorCommission.doctor_id,
+        extract("year", DoctorCommission.created_at).label("year"),
+        extract("month", DoctorCommission.created_at).label("month"),
+        func.sum(DoctorCommission.commission_amount).label("total"),
+        func.count().label("count"),
+    ).where(
+        DoctorCommission.doctor_id.is_not(None),
+        DoctorCommission.created_at.is_not(None),
+    )
+
+    if doctor_id is not None:
+        clear = clear.where(DoctorCommissionMonthly.doctor_id == doctor_id)
+        source = source.where(DoctorCommission.doctor_id == doctor_id)
+
+    source = source.group_by(
+        DoctorCommission.doctor_id,
+        extract("year", DoctorCommission.created_at),
+        extract("month", DoctorCommission.created_at),
+    )
+
+    db.execute(clear)
+    result = db.execute(
+        insert(DoctorCommissionMonthly).from_select(
+            ["doctor_id", "year", "month", "total", "count"], source
+        )
+    )
+    db.commit()
+
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    # python -m app.services.commission_rollup [doctor_id]
+    import sys
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rows = rebuild_rollup(db, int(sys.argv[1]) if len(sys.argv) > 1 else None)
+        print(f"Rebuilt {rows} monthly commission rows")
+    finally:
+        db.close()
@@ -1,7 +1,153 @@
+import threading
+import time
+from datetime import datetime
+from itertools import product
+
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import select, exists
 
+from app.core.config import COMMISSION_RULE_CACHE_SECONDS
+from app.core.database import dialect_insert
+from app.models.booking import Booking
 from app.models.commission_rule import CommissionRule
+from app.models.doctor_commission import DoctorCommission
+from app.services.commission_rollup import apply_to_rollup
+
+
+RULE_FIELDS = ("doctor_id", "test_id", "package_id", "booking_type", "payment_mode")
+FIELD_WEIGHTS = (100, 50, 50, 20, 10)
+
+
+def rule_priority(rule: CommissionRule) -> int:
+    """
+    Higher score = higher priority
+    """
+    return sum(
+        weight
+        for field, weight in zip(RULE_FIELDS, FIELD_WEIGHTS)
+        if getattr(rule, field) is not None
+    )
+
+
+# Every combination of "field is set" / "field is wildcard", most specific
+# first. Ties keep the order in which `product` yields them, so the result is
+# deterministic for a given rule set.
+_SPECIFICITY_MASKS = sorted(
+    product((True, False), repeat=len(RULE_FIELDS)),
+    key=lambda mask: sum(w for used, w in zip(mask, FIELD_WEIGHTS) if used),
+    reverse=True,
+)
+
+
+class CommissionRuleIndex:
+    """
+    Active commission rules compiled into a dict keyed on
+    (doctor_id, test_id, package_id, booking_type, payment_mode),
+    with None standing for "any".
+
+    A lookup probes at most 32 keys in priority order, so resolving a
+    booking never touches the database.
+    """
+
+    def __init__(self, rules: list[CommissionRule], version: int = 0):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self._rules: dict[tuple, CommissionRule] = {}
+
+        for rule in sorted(rules, key=lambda r: r.id or 0):
+            key = tuple(getattr(rule, field) for field in RULE_FIELDS)
+            # First rule (lowest id) wins when two rules share the same key
+            self._rules.setdefault(key, rule)
+
+        used_masks = {
+            tuple(value is not None for value in key) for key in self._rules
+        }
+        self._masks = [mask for mask in _SPECIFICITY_MASKS if mask in used_masks]
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def resolve(
+        self,
+        doctor_id: int | None,
+        test_id: int | None,
+        package_id: int | None,
+        booking_type: str | None,
+        payment_mode: str | None,
+    ) -> CommissionRule | None:
+        values = (doctor_id, test_id, package_id, booking_type, payment_mode)
+
+        for mask in self._masks:
+            key = tuple(v if used else None for v, used in zip(values, mask))
+            # A specific field can only match a booking that has a value for it
+            if any(used and v is None for v, used in zip(values, mask)):
+                continue
+            rule = self._rules.get(key)
+            if rule is not None:
+                return rule
+
+        return None
+
+
+_index: CommissionRuleIndex | None = None
+_index_version = 0
+_index_lock = threading.Lock()
+
+
+def invalidate_rule_index() -> None:
+    """
+    Drop the compiled index. Call after any change to commission_rules.
+    """
+    global _index, _index_version
+    with _index_lock:
+        _index_version += 1
+        _index = None
+
+
+def get_rule_index(db: Session) -> CommissionRuleIndex:
+    """
+    Returns the compiled rule index, rebuilding it when it was invalidated or
+    is older than COMMISSION_RULE_CACHE_SECONDS (so rules created through
+    another worker process are picked up too).
+    """
+    global _index
+
+    index = _index
+    if index is not None and (
+        time.monotonic() - index.loaded_at < COMMISSION_RULE_CACHE_SECONDS
+    ):
+        return index
+
+    with _index_lock:
+        index = _index
+        if index is not None and (
+            time.monotonic() - index.loaded_at < COMMISSION_RULE_CACHE_SECONDS
+        ):
+            return index
+
+        version = _index_version
+        rules = db.query(CommissionRule).filter(
+            CommissionRule.is_active == True
+        ).all()
+        for rule in rules:
+            db.expunge(rule)
+
+        index = CommissionRuleIndex(rules, version)
+        _index = index
+        return index
+
+
+def commission_for_rule(rule: CommissionRule | None, test_amount: float) -> float:
+    if rule is None:
+        return 0.0
+
+    if rule.commission_type == "PERCENTAGE":
+        return round((test_amount * rule.commission_value) / 100, 2)
+
+    if rule.commission_type == "FLAT":
+        return round(rule.commission_value, 2)
+
+    return 0.0
 
 
 def calculate_commission(
@@ -23,55 +169,106 @@ def calculate_commission(
     4. Global rule
     """
 
-   
-    query = db.query(CommissionRule).filter(
-        CommissionRule.is_active == True
+    rule = get_rule_index(db).resolve(
+        doctor_id, test_id, package_id, booking_type, payment_mode
     )
 
-    query = query.filter(
-        or_(CommissionRule.doctor_id == doctor_id, CommissionRule.doctor_id.is_(None)),
-        or_(CommissionRule.test_id == test_id, CommissionRule.test_id.is_(None)),
-        or_(CommissionRule.package_id == package_id, CommissionRule.package_id.is_(None)),
-        or_(CommissionRule.booking_type == booking_type, CommissionRule.booking_type.is_(None)),
-        or_(CommissionRule.payment_mode == payment_mode, CommissionRule.payment_mode.is_(None)),
-    )
+    return commission_for_rule(rule, test_amount)
 
-    rules = query.all()
 
-    if not rules:
-        return 0.0
+def compute_commissions(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    chunk_size: int = 1000,
+) -> dict:
+    """
+    Writes DoctorCommission rows for every booking with a doctor created in
+    [start, end) that has no commission yet.
 
-    def rule_priority(rule: CommissionRule) -> int:
-        """
-        Higher score = higher priority
-        """
-        score = 0
-
-        if rule.doctor_id is not None:
-            score += 100
-        if rule.test_id is not None:
-            score += 50
-        if rule.package_id is not None:
-            score += 50
-        if rule.booking_type is not None:
-            score += 20
-        if rule.payment_mode is not None:
-            score += 10
-
-        return score
-
-  
-    selected_rule = sorted(
-        rules,
-        key=rule_priority,
-        reverse=True
-    )[0]
-
-  
-    if selected_rule.commission_type == "PERCENTAGE":
-        return round((test_amount * selected_rule.commission_value) / 100, 2)
-
-    if selected_rule.commission_type == "FLAT":
-        return round(selected_rule.commission_value, 2)
+    Bookings are read in keyset-paginated chunks (id > last seen id), matched
+    against a single snapshot of the rule index and written with one
+    INSERT ... ON CONFLICT (booking_id) DO NOTHING and one commit per chunk,
+    so overlapping runs never write a booking's commission twice.
+    """
+    index = get_rule_index(db)
 
-    return 0.0
+    last_id = 0
+    processed = 0
+    written = 0
+
+    while True:
+        bookings = db.execute(
+            select(
+                Booking.id,
+                Booking.doctor_id,
+                Booking.test_id,
+                Booking.package_id,
+                Booking.amount,
+                Booking.booking_type,
+                Booking.payment_mode,
+                Booking.created_at,
+            )
+            .where(
+                Booking.id > last_id,
+                Booking.created_at >= start,
+                Booking.created_at < end,
+                Booking.doctor_id.is_not(None),
+                ~exists().where(DoctorCommission.booking_id == Booking.id),
+            )
+            .order_by(Booking.id)
+            .limit(chunk_size)
+        ).all()
+
+        if not bookings:
+            break
+
+        rows = []
+        for b in bookings:
+            rule = index.resolve(
+                b.doctor_id, b.test_id, b.package_id, b.booking_type, b.payment_mode
+            )
+            if rule is None:
+                continue
+
+            rows.append({
+                "doctor_id": b.doctor_id,
+                "booking_id": b.id,
+                "test_amount": b.amount,
+                "commission_percentage": (
+                    rule.commission_value
+                    if rule.commission_type == "PERCENTAGE" else None
+                ),
+                "commission_amount": commission_for_rule(rule, b.amount),
+                "created_at": b.created_at,
+            })
+
+        inserted = []
+        if rows:
+            # A concurrent run may have written some of these bookings since
+            # the SELECT; only rows actually inserted go into the rollup
+            insert_ = dialect_insert(db)
+            inserted = [
+                dict(r._mapping)
+                for r in db.execute(
+                    insert_(DoctorCommission).values(rows)
+                    .on_conflict_do_nothing(index_elements=["booking_id"])
+                    .returning(
+                        DoctorCommission.doctor_id,
+                        DoctorCommission.commission_amount,
+                        DoctorCommission.created_at,
+                    )
+                )
+            ]
+            apply_to_rollup(db, inserted)
+        db.commit()
+
+        processed += len(bookings)
+        written += len(inserted)
+        last_id = bookings[-1].id
+
+    return {
+        "bookings_processed": processed,
+        "commissions_written": written,
+        "rule_index_version": index.version,
+    }
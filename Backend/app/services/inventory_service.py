@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.models.inventory import Inventory
+from app.models.stock_movement import StockMovement
+
+IMPORT_CHUNK_SIZE = 1000
+
+
+def receive_stock(
+    db: Session,
+    item_name: str,
+    type: str | None,
+    quantity: int,
+    reorder_level: int | None = None,
+    user_id: int | None = None,
+) -> tuple[int, int]:
+    """
+    Adds `quantity` to the item, creating it on first receipt, and records a
+    RECEIPT movement. Returns (item_id, new_quantity). Caller commits.
+    """
+    insert_ = dialect_insert(db)
+    values = {"item_name": item_name, "type": type, "quantity": quantity}
+    if reorder_level is not None:
+        values["reorder_level"] = reorder_level
+
+    stmt = insert_(Inventory).values(**values)
+    set_ = {"quantity": Inventory.quantity + stmt.excluded.quantity}
+    if reorder_level is not None:
+        set_["reorder_level"] = stmt.excluded.reorder_level
+
+    item_id, balance = db.execute(
+        stmt.on_conflict_do_update(index_elements=["item_name"], set_=set_)
+        .returning(Inventory.id, Inventory.quantity)
+    ).one()
+
+    db.add(StockMovement(
+        item_id=item_id, kind="RECEIPT", quantity=quantity,
+        balance_after=balance, user_id=user_id
+    ))
+    return item_id, balance
+
+
+def consume_stock(
+    db: Session,
+    item_id: int,
+    quantity: int,
+    user_id: int | None = None,
+    note: str | None = None,
+) -> int:
+    """
+    Takes `quantity` off the item in a single conditional UPDATE, so two
+    concurrent consumptions can never drive it below zero. Raises 404 for an
+    unknown item and 409 when there is not enough stock. Caller commits.
+    """
+    balance = db.execute(
+        update(Inventory)
+        .where(Inventory.id == item_id, Inventory.quantity >= quantity)
+        .values(quantity=Inventory.quantity - quantity)
+        .returning(Inventory.quantity)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+    if balance is None:
+        if db.get(Inventory, item_id) is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+        raise HTTPException(status_code=409, detail="Insufficient stock")
+
+    db.add(StockMovement(
+        item_id=item_id, kind="CONSUMPTION", quantity=-quantity,
+        balance_after=balance, user_id=user_id, note=note
+    ))
+    return balance
+
+
+def parse_import_rows(stream, fmt: str):
+    """
+    Yields row dicts from a CSV (with header) or NDJSON upload of
+    item_name, type, quantity and optional reorder_level.
+    """
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if fmt == "csv":
+        for row in csv.DictReader(text_stream):
+            yield row
+    else:
+        for line in text_stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _clean_row(line: int, raw: dict) -> dict:
+    try:
+        name = str(raw["item_name"]).strip()
+        row = {
+            "item_name": name,
+            "type": raw.get("type") or None,
+            "quantity": int(raw["quantity"]),
+        }
+        # Absent (or empty CSV cell) keeps the item's current reorder level
+        if raw.get("reorder_level") not in (None, ""):
+            row["reorder_level"] = int(raw["reorder_level"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid item in row {line}")
+
+    if not name or row["quantity"] < 0 or row.get("reorder_level", 0) < 0:
+        raise HTTPException(status_code=400, detail=f"Invalid item in row {line}")
+    return row
+
+
+def _import_upsert(db: Session, with_reorder_level: bool):
+    stmt = dialect_insert(db)(Inventory)
+    set_ = {
+        "type": func.coalesce(stmt.excluded.type, Inventory.type),
+        "quantity": stmt.excluded.quantity,
+    }
+    if with_reorder_level:
+        set_["reorder_level"] = stmt.excluded.reorder_level
+    return stmt.on_conflict_do_update(index_elements=["item_name"], set_=set_)
+
+
+def import_items(db: Session, stream, fmt: str, user_id: int | None = None) -> dict:
+    """
+    Stock-take import: sets each listed item's quantity (and type/reorder
+    level, when given) to the imported values, creating new items as
+    needed, and records the difference as an IMPORT movement.
+
+    Rows are upserted with one executemany statement per chunk of
+    IMPORT_CHUNK_SIZE and the whole file commits as one transaction.
+    """
+    counts = {"items": 0, "created": 0}
+    upserts = {flag: _import_upsert(db, flag) for flag in (True, False)}
+
+    def flush(chunk: dict[str, dict]):
+        before = dict(db.execute(
+            select(Inventory.item_name, Inventory.quantity)
+            .where(Inventory.item_name.in_(chunk))
+            .with_for_update()
+        ).all())
+
+        # executemany needs uniform parameter sets
+        for flag, stmt in upserts.items():
+            rows = [r for r in chunk.values() if ("reorder_level" in r) == flag]
+            if rows:
+                db.execute(stmt, rows)
+
+        ids = dict(db.execute(
+            select(Inventory.item_name, Inventory.id)
+            .where(Inventory.item_name.in_(chunk))
+        ).all())
+
+        movements = [
+            {
+                "item_id": ids[name],
+                "kind": "IMPORT",
+                "quantity": row["quantity"] - before.get(name, 0),
+                "balance_after": row["quantity"],
+                "user_id": user_id,
+            }
+            for name, row in chunk.items()
+            if row["quantity"] != before.get(name, 0) or name not in before
+        ]
+        if movements:
+            db.execute(insert(StockMovement), movements)
+
+        counts["items"] += len(chunk)
+        counts["created"] += len(chunk.keys() - before.keys())
+
+    chunk: dict[str, dict] = {}
+    try:
+        for line, raw in enumerate(parse_import_rows(stream, fmt), start=1):
+            row = _clean_row(line, raw)
+            # Later rows for the same item win; one row per item per statement
+            chunk[row["item_name"]] = row
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush(chunk)
+                chunk = {}
+        if chunk:
+            flush(chunk)
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Unreadable {fmt} file: {e}")
+    except HTTPException:
+        db.rollback()
+        raise
+
+    db.commit()
+    return counts
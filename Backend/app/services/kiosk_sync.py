@@ -0,0 +1,146 @@
+from sqlalchemy import and_, case, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.attendance import Attendance
+from app.models.employee import Employee
+from app.models.kiosk_punch import KioskPunch
+from app.schemas.attendance import KioskPunchIn
+from app.utils.attendance_calc import (
+    GRACE_LIMIT,
+    calculate_worked_minutes,
+    punch_status,
+    worked_minutes_sql,
+)
+
+FINAL_STATUSES = ("APPROVED", "REJECTED")
+
+
+def merge_punches(punches) -> dict[tuple, list]:
+    """
+    Collapses punches to one [entry_time, exit_time] per (employee_id, date):
+    the earliest ENTRY and the latest EXIT of the day.
+    """
+    days: dict[tuple, list] = {}
+    for p in punches:
+        day = days.setdefault((p.employee_id, p.punched_at.date()), [None, None])
+        t = p.punched_at.time()
+        if p.kind == "ENTRY":
+            if day[0] is None or t < day[0]:
+                day[0] = t
+        elif day[1] is None or t > day[1]:
+            day[1] = t
+    return days
+
+
+def _earliest(current, incoming):
+    # Earlier of two nullable times, ignoring NULLs
+    return case(
+        (current.is_(None), incoming),
+        (incoming.is_(None), current),
+        (incoming < current, incoming),
+        else_=current
+    )
+
+
+def _latest(current, incoming):
+    # Later of two nullable times, ignoring NULLs
+    return case(
+        (current.is_(None), incoming),
+        (incoming.is_(None), current),
+        (incoming > current, incoming),
+        else_=current
+    )
+
+
+async def sync_kiosk_punches(
+    db: AsyncSession, device_id: str, punches: list[KioskPunchIn]
+) -> dict:
+    """
+    Applies a kiosk's buffered punches in one transaction.
+
+    Punches are recorded in kiosk_punches with ON CONFLICT (device_id,
+    sequence) DO NOTHING, so only ones not seen before are merged. Every
+    affected attendance day is then written with a single bulk upsert whose
+    DO UPDATE merges with the stored row in SQL (earliest entry, latest
+    exit), so concurrent syncs and live /entry or /exit punches for the same
+    day don't overwrite each other. Days already APPROVED or REJECTED keep
+    their status.
+    """
+    employee_ids = {p.employee_id for p in punches}
+    known = set((await db.execute(
+        select(Employee.id).where(Employee.id.in_(employee_ids))
+    )).scalars()) if employee_ids else set()
+
+    accepted = [p for p in punches if p.employee_id in known]
+    rejected = [p.sequence for p in punches if p.employee_id not in known]
+
+    new_punches = []
+    if accepted:
+        insert_ = dialect_insert(db)
+        stmt = insert_(KioskPunch).values([
+            {
+                "device_id": device_id,
+                "sequence": p.sequence,
+                "employee_id": p.employee_id,
+                "kind": p.kind,
+                "punched_at": p.punched_at,
+            }
+            for p in accepted
+        ]).on_conflict_do_nothing(
+            index_elements=["device_id", "sequence"]
+        ).returning(KioskPunch.employee_id, KioskPunch.kind, KioskPunch.punched_at)
+        new_punches = (await db.execute(stmt)).all()
+
+    days = merge_punches(new_punches)
+
+    if days:
+        rows = [
+            {
+                "employee_id": employee_id,
+                "date": day,
+                "entry_time": entry_time,
+                "exit_time": exit_time,
+                "worked_minutes": calculate_worked_minutes(entry_time, exit_time),
+                "status": punch_status(entry_time, exit_time),
+            }
+            for (employee_id, day), (entry_time, exit_time) in days.items()
+        ]
+
+        insert_ = dialect_insert(db)
+        stmt = insert_(Attendance).values(rows)
+        entry_time = _earliest(Attendance.entry_time, stmt.excluded.entry_time)
+        exit_time = _latest(Attendance.exit_time, stmt.excluded.exit_time)
+
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["employee_id", "date"],
+            set_={
+                "entry_time": entry_time,
+                "exit_time": exit_time,
+                "worked_minutes": worked_minutes_sql(
+                    db.get_bind().dialect.name, entry_time, exit_time
+                ),
+                "status": case(
+                    (Attendance.status.in_(FINAL_STATUSES), Attendance.status),
+                    (
+                        and_(
+                            entry_time.is_not(None),
+                            exit_time.is_not(None),
+                            entry_time <= GRACE_LIMIT,
+                        ),
+                        "AUTO"
+                    ),
+                    else_="PENDING"
+                ),
+            },
+        ))
+
+    await db.commit()
+
+    return {
+        "received": len(punches),
+        "applied": len(new_punches),
+        "duplicates": len(accepted) - len(new_punches),
+        "rejected_sequences": rejected,
+        "days_updated": len(days),
+    }
@@ -0,0 +1,103 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+
+
+def get_or_create_patient(db: Session, phone: str) -> User:
+    """
+    Returns the user for a normalized phone, registering a PATIENT if the
+    number is new. users.phone is unique, so a concurrent registration of
+    the same number is resolved by re-reading.
+    """
+    user = db.execute(select(User).where(User.phone == phone)).scalars().first()
+    if user:
+        return user
+
+    try:
+        with db.begin_nested():
+            user = User(phone=phone, role="PATIENT")
+            db.add(user)
+    except IntegrityError:
+        user = db.execute(select(User).where(User.phone == phone)).scalars().one()
+
+    return user
+
+
+async def get_or_create_patient_async(db: AsyncSession, phone: str) -> User:
+    user = (await db.execute(
+        select(User).where(User.phone == phone)
+    )).scalars().first()
+    if user:
+        return user
+
+    try:
+        async with db.begin_nested():
+            user = User(phone=phone, role="PATIENT")
+            db.add(user)
+    except IntegrityError:
+        user = (await db.execute(
+            select(User).where(User.phone == phone)
+        )).scalars().one()
+
+    return user
+
+
+def normalize_stored_phones(db: Session) -> dict:
+    """
+    One-off backfill: rewrites users.phone and reports.phone to E.164.
+    A user whose normalized number already belongs to another user is left
+    untouched and reported, since the two accounts need merging by hand.
+    """
+    from app.models.report import Report
+    from app.utils.phone import normalize_phone
+
+    counts = {"users": 0, "reports": 0, "conflicts": [], "invalid": []}
+
+    for user_id, phone in db.execute(
+        select(User.id, User.phone).where(User.phone.is_not(None))
+    ).all():
+        try:
+            canonical = normalize_phone(phone)
+        except ValueError:
+            counts["invalid"].append(phone)
+            continue
+        if canonical == phone:
+            continue
+        try:
+            with db.begin_nested():
+                db.query(User).filter(User.id == user_id).update(
+                    {User.phone: canonical}, synchronize_session=False
+                )
+            counts["users"] += 1
+        except IntegrityError:
+            counts["conflicts"].append(phone)
+
+    for (phone,) in db.execute(
+        select(Report.phone).where(Report.phone.is_not(None)).distinct()
+    ).all():
+        try:
+            canonical = normalize_phone(phone)
+        except ValueError:
+            counts["invalid"].append(phone)
+            continue
+        if canonical != phone:
+            counts["reports"] += db.query(Report).filter(
+                Report.phone == phone
+            ).update({Report.phone: canonical}, synchronize_session=False)
+
+    db.commit()
+    return counts
+
+
+if __name__ == "__main__":
+    # python -m app.services.patient_service
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(normalize_stored_phones(db))
+    finally:
+        db.close()
@@ -0,0 +1,93 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, exists, func, case, cast, Float
+
+from app.models.employee import Employee
+from app.models.attendance import Attendance
+from app.models.salary_slip import SalarySlip
+from app.utils.date_range import month_bounds
+
+
+# 8 hours or more = full day, 4 hours or more = half day, less = 0
+payable_days_sum = cast(
+    func.sum(
+        case(
+            (Attendance.worked_minutes >= 480, 1.0),
+            (Attendance.worked_minutes >= 240, 0.5),
+            else_=0.0,
+        )
+    ),
+    Float,
+)
+
+
+def approved_attendance_filter(month: int, year: int):
+    start, end = month_bounds(month, year)
+    return (
+        Attendance.status == "APPROVED",
+        Attendance.date >= start,
+        Attendance.date < end,
+    )
+
+
+def salary_for(base_salary: float | None, payable_days: float) -> float:
+    return ((base_salary or 0) / 30) * payable_days
+
+
+def run_payroll(db: Session, month: int, year: int) -> list[dict]:
+    """
+    Generates salary slips for every employee that has none for the month.
+
+    Payable days for all employees come from one grouped aggregate and the
+    slips are written with a single multi-row INSERT.
+    """
+    slip_month = f"{month}-{year}"
+
+    days = (
+        select(
+            Attendance.employee_id,
+            payable_days_sum.label("payable_days"),
+        )
+        .where(*approved_attendance_filter(month, year))
+        .group_by(Attendance.employee_id)
+        .subquery()
+    )
+
+    employees = db.execute(
+        select(
+            Employee.id,
+            Employee.base_salary,
+            func.coalesce(days.c.payable_days, 0).label("payable_days"),
+        )
+        .outerjoin(days, days.c.employee_id == Employee.id)
+        .where(
+            ~exists().where(
+                SalarySlip.employee_id == Employee.id,
+                SalarySlip.month == slip_month,
+            )
+        )
+        .order_by(Employee.id)
+    ).all()
+
+    results = [
+        {
+            "employee_id": e.id,
+            "payable_days": float(e.payable_days),
+            "salary": salary_for(e.base_salary, float(e.payable_days)),
+        }
+        for e in employees
+    ]
+
+    if results:
+        db.execute(
+            insert(SalarySlip).values([
+                {
+                    "employee_id": r["employee_id"],
+                    "month": slip_month,
+                    "amount": r["salary"],
+                }
+                for r in results
+            ])
+        )
+    db.commit()
+
+    return results
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import select, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    REPORT_SPOOL_DIR,
+    REPORT_INGEST_POLL_SECONDS,
+    REPORT_INGEST_BATCH_SIZE,
+    REPORT_INGEST_SETTLE_SECONDS,
+    REPORT_INGEST_PUBLISH,
+)
+from app.models.report import Report
+from app.models.user import User
+from app.utils.file_upload import CHUNK_SIZE, store_blob
+from app.utils.phone import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+FAILED_DIR = "failed"
+
+
+class IngestError(Exception):
+    pass
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sidecar_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+def read_sidecar(path: str) -> dict:
+    sidecar = sidecar_path(path)
+    if not os.path.exists(sidecar):
+        return {}
+    try:
+        with open(sidecar) as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        raise IngestError(f"Unreadable sidecar: {e}")
+    if not isinstance(meta, dict):
+        raise IngestError("Sidecar is not a JSON object")
+    return meta
+
+
+def publish_flag(meta: dict) -> bool:
+    publish = meta.get("publish", REPORT_INGEST_PUBLISH)
+    if not isinstance(publish, bool):
+        raise IngestError(f"Invalid publish {publish!r}, expected true or false")
+    return publish
+
+
+def resolve_phone(db: Session, path: str, meta: dict) -> str:
+    """
+    Patient phone for a spooled report, from (in order) the sidecar's
+    "phone", the sidecar's "patient_id" or a "<phone>_*.pdf" filename.
+    """
+    if meta.get("phone"):
+        raw = str(meta["phone"])
+    elif meta.get("patient_id") is not None:
+        try:
+            patient_id = int(meta["patient_id"])
+        except (TypeError, ValueError):
+            raise IngestError(f"Invalid patient_id {meta['patient_id']!r}")
+        raw = db.execute(
+            select(User.phone).where(User.id == patient_id)
+        ).scalar()
+        if raw is None:
+            raise IngestError(f"Unknown patient_id {meta['patient_id']}")
+    else:
+        name = os.path.basename(path)
+        if "_" not in name:
+            raise IngestError("No sidecar and filename is not <phone>_*.pdf")
+        raw = name.split("_", 1)[0]
+
+    try:
+        return normalize_phone(raw)
+    except ValueError:
+        raise IngestError(f"Invalid phone {raw!r}")
+
+
+def pending_files(spool_dir: str, limit: int) -> list[str]:
+    """
+    Oldest settled PDFs in the spool directory, at most `limit`.
+    """
+    cutoff = time.time() - REPORT_INGEST_SETTLE_SECONDS
+    files = []
+    with os.scandir(spool_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.lower().endswith(".pdf"):
+                continue
+            mtime = entry.stat().st_mtime
+            if mtime <= cutoff:
+                files.append((mtime, entry.path))
+
+    files.sort()
+    return [path for _, path in files[:limit]]
+
+
+def discard(path: str):
+    for p in (path, sidecar_path(path)):
+        if os.path.exists(p):
+            os.unlink(p)
+
+
+def quarantine(spool_dir: str, path: str, reason: str):
+    failed_dir = os.path.join(spool_dir, FAILED_DIR)
+    os.makedirs(failed_dir, exist_ok=True)
+
+    for p in (path, sidecar_path(path)):
+        if os.path.exists(p):
+            os.replace(p, os.path.join(failed_dir, os.path.basename(p)))
+    with open(os.path.join(failed_dir, os.path.basename(path) + ".error"), "w") as f:
+        f.write(reason + "\n")
+
+
+def _reject(spool_dir: str, path: str, reason: str, counts: dict) -> None:
+    logger.warning("Rejected %s: %s", path, reason)
+    quarantine(spool_dir, path, reason)
+    counts["failed"] += 1
+
+
+def _report_row(db: Session, path: str, sha256: str) -> dict:
+    """
+    Validates a spooled file and stores its blob. Raises IngestError for
+    anything wrong with the file itself; database errors propagate.
+    """
+    meta = read_sidecar(path)
+    phone = resolve_phone(db, path, meta)
+    publish = publish_flag(meta)
+
+    try:
+        with open(path, "rb") as f:
+            stored_path, _ = store_blob(db, f)
+    except HTTPException as e:
+        raise IngestError(e.detail)
+    except OSError as e:
+        raise IngestError(f"Unreadable file: {e}")
+
+    return {
+        "phone": phone,
+        "file_path": stored_path,
+        "file_sha256": sha256,
+        "is_published": publish,
+    }
+
+
+def _ingest_one_by_one(db: Session, spool_dir: str, pending: dict, counts: dict) -> None:
+    # Fallback after a failed batch insert: one transaction per file, so the
+    # file that breaks the insert is quarantined instead of blocking the spool
+    for path, sha256 in pending.items():
+        try:
+            db.execute(insert(Report), [_report_row(db, path, sha256)])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            _reject(spool_dir, path, f"{type(e).__name__}: {e}", counts)
+            continue
+        discard(path)
+        counts["ingested"] += 1
+
+
+def ingest_batch(db: Session, spool_dir: str = REPORT_SPOOL_DIR,
+                 batch_size: int = REPORT_INGEST_BATCH_SIZE) -> dict:
+    """
+    Ingests up to `batch_size` spooled PDFs in one transaction.
+
+    Each file is hashed first; content that already has a Report is only
+    removed from the spool, so re-running after a crash (or re-dropping the
+    same PDF) never creates duplicates. New files go through store_blob and
+    all their Report rows are written with a single executemany insert.
+    Spool files are removed only after the commit.
+
+    A file that can't be read or validated is moved to spool/failed/. If the
+    batch insert itself fails, the batch is retried one file per transaction
+    so only the offending file is quarantined. Blobs written by a rolled-back
+    attempt are left to app.services.blob_gc.
+    """
+    counts = {"ingested": 0, "duplicates": 0, "failed": 0}
+
+    paths = pending_files(spool_dir, batch_size)
+    if not paths:
+        return counts
+
+    hashes = {}
+    for path in paths:
+        try:
+            hashes[path] = file_sha256(path)
+        except OSError as e:
+            _reject(spool_dir, path, f"Unreadable file: {e}", counts)
+
+    stored = set(db.execute(
+        select(Report.file_sha256).where(
+            Report.file_sha256.in_(set(hashes.values()))
+        )
+    ).scalars()) if hashes else set()
+    existing = set(stored)
+
+    rows = []
+    done = []
+    pending = {}
+    for path, sha256 in hashes.items():
+        if sha256 in existing:
+            counts["duplicates"] += 1
+            done.append(path)
+            continue
+
+        try:
+            rows.append(_report_row(db, path, sha256))
+        except IngestError as e:
+            _reject(spool_dir, path, str(e), counts)
+            continue
+
+        existing.add(sha256)
+        done.append(path)
+        pending[path] = sha256
+
+    try:
+        if rows:
+            db.execute(insert(Report), rows)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Batch insert failed, retrying %d files one by one", len(pending))
+        # Duplicates of committed reports can go; copies of content from this
+        # batch stay in the spool and are deduplicated on the next pass
+        for path in done:
+            if path not in pending and hashes[path] in stored:
+                discard(path)
+        _ingest_one_by_one(db, spool_dir, pending, counts)
+        return counts
+
+    for path in done:
+        discard(path)
+
+    counts["ingested"] = len(rows)
+    return counts
+
+
+def run(session_factory, spool_dir: str = REPORT_SPOOL_DIR, once: bool = False):
+    """
+    Polls the spool directory. Runs in its own process so instrument bursts
+    never compete with API workers; run one worker per spool directory.
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+
+    while True:
+        db = session_factory()
+        try:
+            counts = ingest_batch(db, spool_dir)
+        except Exception:
+            db.rollback()
+            logger.exception("Report ingestion batch failed")
+            counts = None
+        finally:
+            db.close()
+
+        if counts and any(counts.values()):
+            logger.info("Report ingestion: %s", counts)
+
+        # A full batch means more files are probably waiting
+        if counts and sum(counts.values()) >= REPORT_INGEST_BATCH_SIZE:
+            continue
+        if once:
+            return
+        time.sleep(REPORT_INGEST_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    # python -m app.services.report_ingest [--once]
+    import sys
+    from app.core.database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    run(SessionLocal, once="--once" in sys.argv)
@@ -1,6 +1,13 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 
+from sqlalchemy import Integer, case, cast, extract, func, or_
+
+OFFICE_ENTRY = time(10, 0)
 GRACE_MINUTES = 30
+# Entries up to this time are auto-approved once the exit is punched
+GRACE_LIMIT = (
+    datetime.combine(date.min, OFFICE_ENTRY) + timedelta(minutes=GRACE_MINUTES)
+).time()
 
 def calculate_worked_minutes(entry_time, exit_time):
     if not entry_time or not exit_time:
@@ -15,3 +22,56 @@ def calculate_worked_minutes(entry_time, exit_time):
     worked += timedelta(minutes=GRACE_MINUTES)
 
     return int(worked.total_seconds() / 60)
+
+
+def punch_status(entry_time, exit_time) -> str:
+    if entry_time and exit_time and entry_time <= GRACE_LIMIT:
+        return "AUTO"
+    return "PENDING"
+
+
+def _seconds_since_midnight_sql(dialect_name: str, column):
+    if dialect_name == "postgresql":
+        return extract("epoch", column)
+    if dialect_name == "sqlite":
+        # Time is stored as "HH:MM:SS.ffffff"; julianday() is only
+        # millisecond-accurate, so round away the float noise
+        return func.round(
+            (func.julianday(column) - func.julianday("00:00:00")) * 86400.0, 3
+        )
+    # Standard SQL for anything else
+    return (
+        extract("hour", column) * 3600
+        + extract("minute", column) * 60
+        + extract("second", column)
+    )
+
+
+def worked_minutes_sql(dialect_name: str, entry_column, exit_time):
+    """
+    SQL equivalent of calculate_worked_minutes(entry_column, exit_time), for
+    computing worked minutes inside an UPDATE. exit_time is either a time
+    value or a column expression.
+    """
+    if isinstance(exit_time, time):
+        exit_seconds = (
+            exit_time.hour * 3600 + exit_time.minute * 60
+            + exit_time.second + exit_time.microsecond / 1_000_000
+        )
+        missing = entry_column.is_(None)
+    else:
+        exit_seconds = _seconds_since_midnight_sql(dialect_name, exit_time)
+        missing = or_(entry_column.is_(None), exit_time.is_(None))
+
+    minutes = (
+        (exit_seconds - _seconds_since_midnight_sql(dialect_name, entry_column)) / 60
+        + GRACE_MINUTES
+    )
+    if dialect_name == "postgresql":
+        # CAST rounds on PostgreSQL; int() truncates
+        minutes = func.trunc(minutes)
+
+    return case(
+        (missing, 0),
+        else_=cast(minutes, Integer)
+    )
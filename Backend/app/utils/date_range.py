@@ -0,0 +1,22 @@
+from datetime import date, datetime, time
+
+# Years month_bounds accepts (December needs January 1st of the next year)
+MIN_YEAR = 1
+MAX_YEAR = 9998
+
+
+def month_bounds(month: int, year: int) -> tuple[date, date]:
+    """
+    Half-open [first_of_month, first_of_next_month) range.
+
+    Filtering with `col >= start AND col < end` keeps the predicate sargable,
+    unlike extract("month", col) == month.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def month_datetime_bounds(month: int, year: int) -> tuple[datetime, datetime]:
+    start, end = month_bounds(month, year)
+    return datetime.combine(start, time.min), datetime.combine(end, time.min)
@@ -1,15 +1,113 @@
+import hashlib
 import os
-from fastapi import UploadFile
+import tempfile
+from fastapi import UploadFile, HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import MAX_UPLOAD_BYTES
+from app.core.database import dialect_insert
+from app.models.stored_file import StoredFile
 
 UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+BLOB_DIR = f"{UPLOAD_DIR}/blobs"
+CHUNK_SIZE = 1024 * 1024
+os.makedirs(BLOB_DIR, exist_ok=True)
+
+# mkstemp creates 0600 files; stored files must be readable by a front proxy
+# running as another user (X-Accel-Redirect)
+FILE_MODE = 0o644
+
+
+def stream_to_temp(src, directory: str, max_bytes: int = MAX_UPLOAD_BYTES):
+    """
+    Copies `src` into a temp file inside `directory` in CHUNK_SIZE pieces,
+    hashing as it goes, so memory use does not depend on the file size.
+
+    Returns (temp_path, sha256_hex, size). The temp file lives next to its
+    final location so the caller can os.replace() it into place atomically.
+    Raises 413 (and removes the temp file) once more than `max_bytes` have
+    been read.
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    try:
+        os.chmod(temp_path, FILE_MODE)
+        with os.fdopen(fd, "wb") as out:
+            while chunk := src.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds {max_bytes} bytes"
+                    )
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    return temp_path, digest.hexdigest(), size
+
+
+def blob_path(sha256: str) -> str:
+    # Two levels of 256-way sharding keep every directory small
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def store_blob(db: Session, src, max_bytes: int = MAX_UPLOAD_BYTES):
+    """
+    Stores the content of `src` once per SHA-256 and takes a reference on it.
+
+    Returns (path, sha256). The stored_files row is written in the caller's
+    transaction, so it commits together with the row that uses the path. A
+    blob written by a transaction that rolls back has no stored_files row and
+    is removed by app.services.blob_gc.
+    """
+    temp_path, sha256, size = stream_to_temp(src, BLOB_DIR, max_bytes)
+    path = blob_path(sha256)
+
+    if os.path.exists(path):
+        # Same content already on disk: drop the copy we just received and
+        # touch the blob so blob_gc doesn't take it for an old orphan
+        os.unlink(temp_path)
+        os.utime(path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+
+    insert_ = dialect_insert(db)
+    stmt = insert_(StoredFile).values(
+        sha256=sha256, path=path, size=size, ref_count=1
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["sha256"],
+        set_={"ref_count": StoredFile.ref_count + 1},
+    ))
+
+    return path, sha256
+
+
+def release_blob(db: Session, sha256: str) -> None:
+    """
+    Drops one reference taken by store_blob, e.g. when the report or
+    prescription using it is deleted. Unreferenced blobs are removed by
+    app.services.blob_gc; the caller commits.
+    """
+    db.execute(
+        update(StoredFile)
+        .where(StoredFile.sha256 == sha256, StoredFile.ref_count > 0)
+        .values(ref_count=StoredFile.ref_count - 1)
+    )
 
-def save_file(file: UploadFile, folder: str):
-    path = f"{UPLOAD_DIR}/{folder}"
-    os.makedirs(path, exist_ok=True)
-    file_path = f"{path}/{file.filename}"
 
-    with open(file_path, "wb") as f:
-        f.write(file.file.read())
+def save_file(db: Session, file: UploadFile):
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes"
+        )
 
-    return file_path
+    return store_blob(db, file.file)
@@ -1,27 +1,67 @@
+import asyncio
+import logging
 import random
-import time
 
-otp_store = {}
-OTP_EXPIRY_SECONDS = 300  # 5 minutes
+from app.core.config import (
+    OTP_BACKEND,
+    OTP_TTL_SECONDS,
+    OTP_MAX_ENTRIES,
+    OTP_PURGE_INTERVAL_SECONDS,
+    OTP_PURGE_BATCH_SIZE,
+)
+from app.utils.otp_store import OTPBackend, MemoryOTPBackend, SQLOTPBackend
 
+OTP_EXPIRY_SECONDS = OTP_TTL_SECONDS
+
+# Login OTPs are also what patients type when booking
+PURPOSE_LOGIN = "LOGIN"
+PURPOSE_REPORT = "REPORT"
+
+logger = logging.getLogger(__name__)
+
+_backend: OTPBackend | None = None
+
+
+def get_otp_backend() -> OTPBackend:
+    global _backend
+
+    if _backend is None:
+        if OTP_BACKEND == "memory":
+            _backend = MemoryOTPBackend(max_entries=OTP_MAX_ENTRIES)
+        elif OTP_BACKEND == "sql":
+            from app.core.database import async_session
+            _backend = SQLOTPBackend(async_session)
+        else:
+            raise RuntimeError(f"Unknown OTP_BACKEND: {OTP_BACKEND}")
+
+    return _backend
 
 
 def generate_otp() -> int:
     return random.randint(100000, 999999)
 
 
-def verify_otp_for_phone(phone: str, otp: int) -> bool:
-    data = otp_store.get(phone)
+async def issue_otp(phone: str, purpose: str = PURPOSE_LOGIN) -> int:
+    otp = generate_otp()
+    await get_otp_backend().put(purpose, phone, otp, OTP_EXPIRY_SECONDS)
+    return otp
+
 
-    if not data:
-        return False
+async def verify_otp_for_phone(phone: str, otp: int, purpose: str = PURPOSE_LOGIN) -> bool:
+    return await get_otp_backend().consume(purpose, phone, otp)
 
-    if time.time() > data["expires_at"]:
-        otp_store.pop(phone, None)
-        return False
 
-    if data["otp"] != otp:
-        return False
+async def purge_otps_periodically():
+    """
+    Background task started from the app lifespan: removes used and expired
+    OTPs every OTP_PURGE_INTERVAL_SECONDS.
+    """
+    while True:
+        try:
+            removed = await get_otp_backend().purge_expired(OTP_PURGE_BATCH_SIZE)
+            if removed:
+                logger.info("Purged %d used/expired OTPs", removed)
+        except Exception:
+            logger.exception("OTP purge failed")
 
-    otp_store.pop(phone, None)
-    return True
+        await asyncio.sleep(OTP_PURGE_INTERVAL_SECONDS)
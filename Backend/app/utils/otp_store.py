@@ -0,0 +1,183 @@
+import heapq
+from abc import ABC, abstractmethod
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update, delete, select, or_
+
+from app.models.report_otp import ReportOTP
+
+
+class OTPBackend(ABC):
+    """
+    Storage for one-time passwords, keyed on (purpose, phone).
+
+    `consume` must be atomic: a given OTP verifies at most once, even when
+    several requests race on it. Methods are coroutines so the SQL backend
+    can await the database from the async endpoints.
+    """
+
+    @abstractmethod
+    async def put(self, purpose: str, phone: str, otp: int, ttl_seconds: int) -> None:
+        ...
+
+    @abstractmethod
+    async def consume(self, purpose: str, phone: str, otp: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def purge_expired(self, batch_size: int) -> int:
+        """
+        Drops used and expired OTPs, returning how many were removed.
+        """
+
+
+class MemoryOTPBackend(OTPBackend):
+    """
+    Process-local store for single-worker and development setups.
+
+    Expired entries are swept from a min-heap on every call, and the store
+    never holds more than `max_entries` (the soonest-expiring OTP is evicted
+    first).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: dict[tuple[str, str], tuple[int, float]] = {}
+        self._expiry_heap: list[tuple[float, tuple[str, str]]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _pop_heap(self) -> bool:
+        # Heap entries go stale when an OTP is reissued or consumed, so only
+        # delete the entry if it still carries this expiry
+        expires_at, key = heapq.heappop(self._expiry_heap)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] == expires_at:
+            del self._entries[key]
+            return True
+        return False
+
+    def _sweep(self, now: float) -> None:
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            self._pop_heap()
+
+    async def put(self, purpose: str, phone: str, otp: int, ttl_seconds: int) -> None:
+        key = (purpose, phone)
+        now = time.monotonic()
+        expires_at = now + ttl_seconds
+
+        with self._lock:
+            self._sweep(now)
+
+            if key not in self._entries:
+                while len(self._entries) >= self.max_entries and self._expiry_heap:
+                    self._pop_heap()
+
+            self._entries[key] = (otp, expires_at)
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    async def consume(self, purpose: str, phone: str, otp: int) -> bool:
+        key = (purpose, phone)
+
+        with self._lock:
+            self._sweep(time.monotonic())
+
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != otp:
+                return False
+
+            del self._entries[key]
+            return True
+
+    async def purge_expired(self, batch_size: int) -> int:
+        with self._lock:
+            before = len(self._entries)
+            self._sweep(time.monotonic())
+            # Drop stale heap entries left behind by reissued/consumed OTPs
+            if len(self._expiry_heap) > 2 * len(self._entries):
+                self._expiry_heap = [
+                    (expires_at, key)
+                    for key, (_, expires_at) in self._entries.items()
+                ]
+                heapq.heapify(self._expiry_heap)
+            return before - len(self._entries)
+
+
+class SQLOTPBackend(OTPBackend):
+    """
+    Stores OTPs in the report_otps table so every worker sees the same state.
+    Consuming is a single conditional UPDATE, so only one request can win.
+
+    `session_factory` returns an async session (app.core.database.async_session),
+    so OTP calls await the database like the endpoints using them.
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    async def put(self, purpose: str, phone: str, otp: int, ttl_seconds: int) -> None:
+        async with self.session_factory() as db:
+            # A reissued OTP replaces the earlier ones, as in MemoryOTPBackend
+            await db.execute(
+                update(ReportOTP)
+                .where(
+                    ReportOTP.purpose == purpose,
+                    ReportOTP.phone == phone,
+                    ReportOTP.is_used == 0,
+                )
+                .values(is_used=1)
+            )
+            db.add(ReportOTP(
+                purpose=purpose,
+                phone=phone,
+                otp=otp,
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds),
+            ))
+            await db.commit()
+
+    async def consume(self, purpose: str, phone: str, otp: int) -> bool:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(ReportOTP)
+                .where(
+                    ReportOTP.purpose == purpose,
+                    ReportOTP.phone == phone,
+                    ReportOTP.otp == otp,
+                    ReportOTP.is_used == 0,
+                    ReportOTP.expires_at >= datetime.utcnow(),
+                )
+                .values(is_used=1)
+            )
+            await db.commit()
+            return result.rowcount > 0
+
+    async def purge_expired(self, batch_size: int) -> int:
+        """
+        Deletes in batches of `batch_size`, committing each one, so the purge
+        never holds long locks on the table.
+        """
+        removed = 0
+
+        while True:
+            async with self.session_factory() as db:
+                stale = (
+                    select(ReportOTP.id)
+                    .where(or_(
+                        ReportOTP.is_used == 1,
+                        ReportOTP.expires_at < datetime.utcnow(),
+                        ReportOTP.expires_at.is_(None),
+                    ))
+                    .limit(batch_size)
+                )
+                result = await db.execute(
+                    delete(ReportOTP).where(ReportOTP.id.in_(stale))
+                )
+                await db.commit()
+
+            removed += result.rowcount
+            if result.rowcount < batch_size:
+                return removed
@@ -0,0 +1,44 @@
+import re
+from typing import Annotated
+
+from pydantic import AfterValidator
+
+from app.core.config import DEFAULT_COUNTRY_CODE
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_phone(raw: str) -> str:
+    """
+    Canonicalizes a phone number to E.164 ("+919876543210").
+
+    Numbers without a country code are taken to be national numbers in
+    DEFAULT_COUNTRY_CODE; a leading trunk "0" is dropped. Raises ValueError
+    for anything that can't be a valid E.164 number.
+    """
+    value = raw.strip()
+    international = value.startswith("+") or value.startswith("00")
+    digits = _NON_DIGITS.sub("", value)
+
+    if value.startswith("00"):
+        digits = digits[2:]
+
+    if not international:
+        national = digits[1:] if digits.startswith("0") else digits
+        if len(national) == 10:
+            digits = DEFAULT_COUNTRY_CODE + national
+        elif not (
+            digits.startswith(DEFAULT_COUNTRY_CODE)
+            and len(digits) == len(DEFAULT_COUNTRY_CODE) + 10
+        ):
+            raise ValueError("Invalid phone number")
+
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        raise ValueError("Invalid phone number")
+
+    return "+" + digits
+
+
+# Use for every phone that enters through the API so lookups always compare
+# canonical values (works for query params, Form fields and models)
+Phone = Annotated[str, AfterValidator(normalize_phone)]
@@ -0,0 +1,43 @@
+"""
+Cost of verifying one bearer token: python-jose, PyJWT (if installed) and
+a VerifiedTokenCache hit.
+
+    cd Backend
+    python -m benchmarks.bench_jwt_decode
+"""
+import os
+import timeit
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.core import security
+from app.core.token_cache import VerifiedTokenCache
+
+ROUNDS = 20_000
+
+
+def per_call_us(fn) -> float:
+    return min(timeit.repeat(fn, number=ROUNDS, repeat=3)) / ROUNDS * 1e6
+
+
+def main():
+    token = security.create_access_token({"user_id": 1, "role": "ADMIN"})
+
+    results = {"python-jose": per_call_us(lambda: security._decode_with_jose(token))}
+
+    try:
+        security._decode_with_pyjwt(token)
+        results["pyjwt"] = per_call_us(lambda: security._decode_with_pyjwt(token))
+    except ImportError:
+        results["pyjwt"] = None
+
+    cache = VerifiedTokenCache(4096)
+    cache.put(cache.key(token), security._decode_with_jose(token))
+    results["cache hit"] = per_call_us(lambda: dict(cache.get(cache.key(token))))
+
+    for name, us in results.items():
+        print(f"{name:>12}: " + (f"{us:8.2f} us/decode" if us else "not installed"))
+
+
+if __name__ == "__main__":
+    main()
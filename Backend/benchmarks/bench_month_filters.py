@@ -0,0 +1,119 @@
+"""
+Compares extract(month/year) filters against half-open date ranges as the
+attendance and doctor_commissions tables grow.
+
+    cd Backend
+    python -m benchmarks.bench_month_filters
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_month_filters
+
+Tables are created in (and dropped from) the BENCH_DATABASE_URL database,
+so never point it at production.
+"""
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, extract, insert, select, func
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.employee import Employee
+from app.models.attendance import Attendance
+from app.models.doctor_commission import DoctorCommission
+from app.utils.date_range import month_bounds, month_datetime_bounds
+
+ROW_COUNTS = (10_000, 100_000, 500_000)
+EMPLOYEES = 200
+DOCTORS = 200
+REPEAT = 50
+MONTH, YEAR = 6, 2025
+
+
+def seed(db: Session, rows: int):
+    Base.metadata.drop_all(db.bind, tables=[
+        Attendance.__table__, DoctorCommission.__table__, Employee.__table__
+    ])
+    Base.metadata.create_all(db.bind, tables=[
+        Employee.__table__, Attendance.__table__, DoctorCommission.__table__
+    ])
+
+    db.execute(insert(Employee), [
+        {"id": i, "name": f"emp{i}", "base_salary": 30000}
+        for i in range(1, EMPLOYEES + 1)
+    ])
+
+    days = rows // EMPLOYEES
+    start = date(YEAR, MONTH, 1) - timedelta(days=days // 2)
+    db.execute(insert(Attendance), [
+        {
+            "employee_id": e,
+            "date": start + timedelta(days=d),
+            "worked_minutes": random.randint(0, 600),
+            "status": "APPROVED",
+        }
+        for e in range(1, EMPLOYEES + 1)
+        for d in range(days)
+    ])
+
+    first = datetime(YEAR, MONTH, 1) - timedelta(days=days // 2)
+    db.execute(insert(DoctorCommission), [
+        {
+            "doctor_id": random.randint(1, DOCTORS),
+            "booking_id": i,
+            "commission_amount": 100,
+            "created_at": first + timedelta(minutes=i * days * 1440 // rows),
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def timed(db: Session, stmt) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        db.execute(stmt).all()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    engine = create_engine(os.getenv("BENCH_DATABASE_URL", "sqlite://"))
+
+    day_start, day_end = month_bounds(MONTH, YEAR)
+    ts_start, ts_end = month_datetime_bounds(MONTH, YEAR)
+
+    queries = {
+        "attendance extract": select(func.count()).where(
+            Attendance.employee_id == 7,
+            extract("month", Attendance.date) == MONTH,
+            extract("year", Attendance.date) == YEAR,
+        ),
+        "attendance range": select(func.count()).where(
+            Attendance.employee_id == 7,
+            Attendance.date >= day_start,
+            Attendance.date < day_end,
+        ),
+        "commission extract": select(func.sum(DoctorCommission.commission_amount)).where(
+            DoctorCommission.doctor_id == 7,
+            extract("month", DoctorCommission.created_at) == MONTH,
+            extract("year", DoctorCommission.created_at) == YEAR,
+        ),
+        "commission range": select(func.sum(DoctorCommission.commission_amount)).where(
+            DoctorCommission.doctor_id == 7,
+            DoctorCommission.created_at >= ts_start,
+            DoctorCommission.created_at < ts_end,
+        ),
+    }
+
+    print(f"{'rows':>10}  " + "  ".join(f"{name:>20}" for name in queries))
+    for rows in ROW_COUNTS:
+        with Session(engine) as db:
+            seed(db, rows)
+            results = [timed(db, stmt) for stmt in queries.values()]
+        print(f"{rows:>10}  " + "  ".join(f"{ms:>17.3f} ms" for ms in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Times the report lookups done by /reports/download (phone + report id +
+published) and the patient listing as the reports table grows, with and
+without ix_reports_phone_created.
+
+    cd Backend
+    python -m benchmarks.bench_phone_lookup
+    BENCH_DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_phone_lookup
+
+Tables are created in (and dropped from) the BENCH_DATABASE_URL database,
+so never point it at production.
+"""
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.report import Report
+
+ROW_COUNTS = (10_000, 100_000, 500_000)
+PATIENTS = 50_000
+REPEAT = 200
+
+
+def phone_for(i: int) -> str:
+    return f"+919{i:09d}"
+
+
+def seed(db: Session, rows: int):
+    Base.metadata.drop_all(db.bind, tables=[Report.__table__])
+    Base.metadata.create_all(db.bind, tables=[Report.__table__])
+    db.execute(insert(Report), [
+        {
+            "phone": phone_for(random.randint(1, PATIENTS)),
+            "file_path": f"uploads/{i}.pdf",
+            "is_published": True,
+            "created_at": datetime(2020, 1, 1) + timedelta(minutes=i),
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def timed(db: Session, rows: int) -> float:
+    probes = [
+        (phone_for(random.randint(1, PATIENTS)), random.randint(1, rows))
+        for _ in range(REPEAT)
+    ]
+    start = time.perf_counter()
+    for phone, report_id in probes:
+        db.execute(
+            select(Report).where(
+                Report.id == report_id,
+                Report.phone == phone,
+                Report.is_published == True,
+            )
+        ).first()
+        db.execute(
+            select(Report.id, Report.created_at)
+            .where(Report.phone == phone, Report.is_published == True)
+            .order_by(Report.created_at.desc(), Report.id.desc())
+            .limit(20)
+        ).all()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    engine = create_engine(os.getenv("BENCH_DATABASE_URL", "sqlite://"))
+    phone_index = next(i for i in Report.__table__.indexes if i.name == "ix_reports_phone_created")
+
+    print(f"{'rows':>10}  {'indexed':>14}  {'no index':>14}")
+    for rows in ROW_COUNTS:
+        with Session(engine) as db:
+            seed(db, rows)
+            indexed = timed(db, rows)
+            phone_index.drop(db.connection())
+            db.commit()
+            scanned = timed(db, rows)
+        print(f"{rows:>10}  {indexed:>11.3f} ms  {scanned:>11.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Minimal HTTP load generator for comparing deployments, or the sync and
+async database modes (DB_ASYNC) of this tree.
+
+    pip install httpx
+    python benchmarks/load_test.py http://localhost:8000 --path /attendance/entry \
+        --method POST --param employee_id={n} --concurrency 200 --duration 20
+    python benchmarks/load_test.py http://old:8000 http://new:8000 --path ...
+
+    # Starts this tree under uvicorn once with DB_ASYNC=false and once with
+    # DB_ASYNC=true (same database, same worker count) and loads each in turn
+    cd Backend
+    python benchmarks/load_test.py --modes --workers 4 --path /attendance/entry \
+        --method POST --param employee_id={n} --concurrency 200 --duration 20
+
+`{n}` in a parameter value is replaced with a running request counter so
+requests do not all hit the same row. Run the server with the same worker
+count for every target being compared. With --modes each run continues the
+counter where the previous one stopped, so modes don't collide on rows.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def worker(client, args, counter, deadline, latencies, statuses):
+    while time.perf_counter() < deadline:
+        n = next(counter)
+        params = {
+            key: value.replace("{n}", str(n))
+            for key, value in (p.split("=", 1) for p in args.param)
+        }
+        start = time.perf_counter()
+        try:
+            response = await client.request(args.method, args.path, params=params)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        except httpx.HTTPError as exc:
+            statuses[type(exc).__name__] = statuses.get(type(exc).__name__, 0) + 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(base_url: str, args, counter=None) -> dict:
+    latencies: list[float] = []
+    statuses: dict = {}
+    counter = counter or itertools.count(args.start)
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            worker(client, args, counter, deadline, latencies, statuses)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pct = lambda q: latencies[int(q * (len(latencies) - 1))] * 1000 if latencies else 0
+    return {
+        "url": base_url,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0,
+        "statuses": statuses,
+    }
+
+
+def wait_until_up(base_url: str, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            httpx.get(base_url + "/docs", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def serve(db_async: bool, args) -> subprocess.Popen:
+    env = dict(os.environ, DB_ASYNC="true" if db_async else "false")
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(args.port),
+            "--workers", str(args.workers),
+            "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def report(r: dict, label: str | None = None) -> None:
+    print(
+        f"{label or r['url']}: {r['requests']} requests, {r['rps']:.1f} req/s, "
+        f"p50 {r['p50_ms']:.1f} ms, p99 {r['p99_ms']:.1f} ms, "
+        f"mean {r['mean_ms']:.1f} ms, statuses {r['statuses']}"
+    )
+
+
+def compare_modes(args) -> None:
+    base_url = f"http://127.0.0.1:{args.port}"
+    counter = itertools.count(args.start)
+
+    for db_async in (False, True):
+        server = serve(db_async, args)
+        try:
+            wait_until_up(base_url)
+            r = asyncio.run(run(base_url, args, counter))
+        finally:
+            server.terminate()
+            server.wait()
+        report(r, f"DB_ASYNC={'true' if db_async else 'false'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("urls", nargs="*", help="base URL(s) to compare")
+    parser.add_argument("--modes", action="store_true",
+                        help="serve this tree in both DB_ASYNC modes and compare them")
+    parser.add_argument("--port", type=int, default=8765, help="port used by --modes")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for --modes")
+    parser.add_argument("--path", required=True)
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--param", action="append", default=[], help="key=value")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--start", type=int, default=1, help="first {n} value")
+    args = parser.parse_args()
+
+    if args.modes:
+        compare_modes(args)
+        return
+    if not args.urls:
+        parser.error("give base URL(s) or --modes")
+
+    for url in args.urls:
+        report(asyncio.run(run(url, args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Hammers /attendance/entry and /attendance/exit from many threads, with
+every employee double-tapping both punches, then checks the attendance
+table for duplicates and lost updates.
+
+    cd Backend
+    uvicorn app.main:app --workers 4 &
+    python -m benchmarks.stress_punch http://localhost:8000 --employees 200 --taps 5
+
+The checks read today's rows straight from DATABASE_URL (the server's
+database), and employees 1..N are created there if missing and have today's
+attendance cleared first, so never point it at production.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+import httpx
+from sqlalchemy import delete, func, select
+
+from app.core.database import SessionLocal, dialect_insert
+from app.models.attendance import Attendance
+from app.models.employee import Employee
+
+
+def prepare(employees: int):
+    db = SessionLocal()
+    try:
+        insert_ = dialect_insert(db)
+        db.execute(insert_(Employee).values([
+            {"id": i, "name": f"stress{i}", "base_salary": 0}
+            for i in range(1, employees + 1)
+        ]).on_conflict_do_nothing(index_elements=["id"]))
+        db.execute(delete(Attendance).where(
+            Attendance.employee_id <= employees,
+            Attendance.date == date.today()
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def hammer(base_url: str, path: str, jobs: list[int], threads: int) -> Counter:
+    statuses = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+    chunks = [jobs[i::threads] for i in range(threads)]
+
+    def worker(chunk):
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            barrier.wait()
+            for employee_id in chunk:
+                try:
+                    code = client.post(path, params={"employee_id": employee_id}).status_code
+                except httpx.HTTPError as exc:
+                    code = type(exc).__name__
+                with lock:
+                    statuses[code] += 1
+
+    pool = [threading.Thread(target=worker, args=(c,)) for c in chunks]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return statuses
+
+
+def check(employees: int, taps: int, entry: Counter, exit_: Counter) -> list[str]:
+    problems = []
+    if entry[200] != employees:
+        problems.append(f"expected {employees} successful entries, got {entry[200]}")
+    if entry[400] != employees * (taps - 1):
+        problems.append(f"expected {employees * (taps - 1)} rejected entries, got {entry[400]}")
+    if exit_[200] != employees * taps:
+        problems.append(f"expected every exit to succeed, got {dict(exit_)}")
+
+    db = SessionLocal()
+    try:
+        duplicates = db.execute(
+            select(Attendance.employee_id, func.count())
+            .where(Attendance.employee_id <= employees, Attendance.date == date.today())
+            .group_by(Attendance.employee_id)
+            .having(func.count() > 1)
+        ).all()
+        missing_exit = db.execute(
+            select(func.count()).where(
+                Attendance.employee_id <= employees,
+                Attendance.date == date.today(),
+                Attendance.exit_time.is_(None)
+            )
+        ).scalar()
+    finally:
+        db.close()
+
+    if duplicates:
+        problems.append(f"{len(duplicates)} employees have duplicate rows")
+    if missing_exit:
+        problems.append(f"{missing_exit} rows lost their exit punch")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base_url")
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--taps", type=int, default=5, help="punches per employee per endpoint")
+    parser.add_argument("--threads", type=int, default=64)
+    args = parser.parse_args()
+
+    prepare(args.employees)
+    jobs = [e for e in range(1, args.employees + 1) for _ in range(args.taps)]
+
+    results = {}
+    for path in ("/attendance/entry", "/attendance/exit"):
+        random.shuffle(jobs)
+        started = time.perf_counter()
+        results[path] = hammer(args.base_url, path, jobs, args.threads)
+        elapsed = time.perf_counter() - started
+        print(f"{path:<20} {len(jobs) / elapsed:>8.0f} req/s  {dict(results[path])}")
+
+    problems = check(
+        args.employees, args.taps,
+        results["/attendance/entry"], results["/attendance/exit"]
+    )
+    for problem in problems:
+        print("FAIL:", problem)
+    if not problems:
+        print("OK: one row per employee, no lost exits")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
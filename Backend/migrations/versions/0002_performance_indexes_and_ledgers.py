@@ -0,0 +1,324 @@
+"""performance indexes and ledgers
+
+Everything added on top of the original create_all schema: lookup and
+keyset indexes, the commission rollup (filled from the existing
+commissions), content-addressed uploads, kiosk punches and the inventory
+ledger. Existing duplicate attendance days and inventory items (which the
+new unique constraints forbid) are merged first. Existing bookings get
+created_at from their commission, or the migration time if they have none.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 16:22:41.226226
+
+"""
+from datetime import date, datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _utc_now() -> str:
+    # The app writes datetime.utcnow(); now() would be in the session timezone
+    # (same expressions as app.core.database.utc_now)
+    name = op.get_bind().dialect.name
+    if name == "postgresql":
+        return "timezone('utc', now())"
+    if name == "sqlite":
+        return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+    return "CURRENT_TIMESTAMP"
+
+
+def _merge_duplicate_attendance() -> None:
+    """
+    Racing punches could insert the same day twice. Each day's rows are
+    merged into its oldest row (earliest entry, latest exit, approved if
+    any row was) and the others are deleted.
+    """
+    attendance = sa.table(
+        'attendance',
+        sa.column('id', sa.Integer()),
+        sa.column('employee_id', sa.Integer()),
+        sa.column('date', sa.Date()),
+        sa.column('entry_time', sa.Time()),
+        sa.column('exit_time', sa.Time()),
+        sa.column('worked_minutes', sa.Integer()),
+        sa.column('status', sa.String()),
+        sa.column('approved_by', sa.Integer()),
+    )
+    bind = op.get_bind()
+    duplicated = (
+        sa.select(attendance.c.employee_id, attendance.c.date)
+        .group_by(attendance.c.employee_id, attendance.c.date)
+        .having(sa.func.count() > 1)
+        .subquery()
+    )
+    rows = bind.execute(
+        sa.select(attendance)
+        .join(duplicated, sa.and_(
+            attendance.c.employee_id == duplicated.c.employee_id,
+            attendance.c.date == duplicated.c.date,
+        ))
+        .order_by(attendance.c.employee_id, attendance.c.date, attendance.c.id)
+    ).all()
+
+    days = {}
+    for row in rows:
+        days.setdefault((row.employee_id, row.date), []).append(row)
+
+    for day_rows in days.values():
+        keep, extra = day_rows[0], day_rows[1:]
+        entries = [r.entry_time for r in day_rows if r.entry_time is not None]
+        exits = [r.exit_time for r in day_rows if r.exit_time is not None]
+        entry_time = min(entries) if entries else None
+        exit_time = max(exits) if exits else None
+
+        statuses = {r.status for r in day_rows}
+        approved = [r for r in day_rows if r.status == "APPROVED"]
+        if approved:
+            status, approved_by = "APPROVED", approved[0].approved_by
+        elif "AUTO" in statuses:
+            status, approved_by = "AUTO", keep.approved_by
+        else:
+            status, approved_by = keep.status, keep.approved_by
+
+        # calculate_worked_minutes (30 minutes grace) as of this revision
+        worked_minutes = 0
+        if entry_time and exit_time:
+            worked = (
+                datetime.combine(date.min, exit_time)
+                - datetime.combine(date.min, entry_time)
+                + timedelta(minutes=30)
+            )
+            worked_minutes = int(worked.total_seconds() / 60)
+
+        bind.execute(
+            attendance.update()
+            .where(attendance.c.id == keep.id)
+            .values(
+                entry_time=entry_time,
+                exit_time=exit_time,
+                worked_minutes=worked_minutes,
+                status=status,
+                approved_by=approved_by,
+            )
+        )
+        bind.execute(
+            attendance.delete()
+            .where(attendance.c.id.in_([r.id for r in extra]))
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('doctor_commission_monthly',
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('doctor_id', 'year', 'month')
+    )
+    with op.batch_alter_table('doctor_commission_monthly', schema=None) as batch_op:
+        batch_op.create_index('ix_doctor_commission_monthly_leaderboard', ['year', 'month', 'total'], unique=False)
+
+    # Start the rollup from the existing commissions (same grouping as
+    # app.services.commission_rollup.rebuild_rollup); the leaderboard reads
+    # only the rollup
+    commissions = sa.table(
+        'doctor_commissions',
+        sa.column('doctor_id', sa.Integer()),
+        sa.column('commission_amount', sa.Float()),
+        sa.column('created_at', sa.DateTime()),
+    )
+    year = sa.extract('year', commissions.c.created_at)
+    month = sa.extract('month', commissions.c.created_at)
+    op.execute(
+        sa.table(
+            'doctor_commission_monthly',
+            sa.column('doctor_id'), sa.column('year'), sa.column('month'),
+            sa.column('total'), sa.column('count'),
+        ).insert().from_select(
+            ['doctor_id', 'year', 'month', 'total', 'count'],
+            sa.select(
+                commissions.c.doctor_id,
+                year,
+                month,
+                sa.func.sum(commissions.c.commission_amount),
+                sa.func.count(),
+            ).where(
+                commissions.c.doctor_id.is_not(None),
+                commissions.c.created_at.is_not(None),
+            ).group_by(commissions.c.doctor_id, year, month),
+        )
+    )
+
+    op.create_table('stored_files',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_table('kiosk_punches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('device_id', sa.String(), nullable=False),
+    sa.Column('sequence', sa.Integer(), nullable=False),
+    sa.Column('employee_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('punched_at', sa.DateTime(), nullable=False),
+    sa.Column('received_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('device_id', 'sequence', name='uq_kiosk_punches_device_sequence')
+    )
+    op.create_table('stock_movements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('balance_after', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['item_id'], ['inventory.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+        batch_op.create_index('ix_stock_movements_item_created', ['item_id', 'created_at'], unique=False)
+
+    _merge_duplicate_attendance()
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_attendance_employee_date', ['employee_id', 'date'])
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_bookings_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_bookings_user_id'), ['user_id'], unique=False)
+
+    # Existing bookings predate created_at: use their commission's timestamp
+    # where there is one, otherwise the migration time, so the next
+    # compute-commissions run for the current month picks them up
+    op.execute(
+        "UPDATE bookings SET created_at = COALESCE("
+        "(SELECT MIN(dc.created_at) FROM doctor_commissions dc WHERE dc.booking_id = bookings.id), "
+        f"{_utc_now()})"
+    )
+    # Set after the backfill; SQLite can't ADD COLUMN with a non-constant default
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DateTime(),
+               server_default=sa.text(f"({_utc_now()})"))
+
+    with op.batch_alter_table('doctor_commissions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_doctor_commissions_booking_id'), ['booking_id'], unique=False)
+        batch_op.create_index('ix_doctor_commissions_doctor_created', ['doctor_id', 'created_at'], unique=False)
+
+    # /inventory/ used to insert a new row per receipt: fold duplicates into
+    # the oldest row of each item before item_name becomes unique
+    op.execute("UPDATE inventory SET item_name = 'item-' || id WHERE item_name IS NULL")
+    op.execute("UPDATE inventory SET quantity = 0 WHERE quantity IS NULL")
+    op.execute(
+        "UPDATE inventory SET quantity = "
+        "(SELECT SUM(i2.quantity) FROM inventory i2 WHERE i2.item_name = inventory.item_name) "
+        "WHERE id IN (SELECT MIN(id) FROM inventory GROUP BY item_name HAVING COUNT(*) > 1)"
+    )
+    op.execute(
+        "DELETE FROM inventory WHERE id NOT IN "
+        "(SELECT MIN(id) FROM inventory GROUP BY item_name)"
+    )
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reorder_level', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.alter_column('item_name',
+               existing_type=sa.VARCHAR(),
+               nullable=False)
+        batch_op.alter_column('quantity',
+               existing_type=sa.INTEGER(),
+               nullable=False)
+        batch_op.create_index('ix_inventory_low_stock', ['quantity'], unique=False, postgresql_where=sa.text('quantity <= reorder_level'), sqlite_where=sa.text('quantity <= reorder_level'))
+        batch_op.create_unique_constraint('uq_inventory_item_name', ['item_name'])
+
+    with op.batch_alter_table('prescriptions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_prescriptions_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('report_otps', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('purpose', sa.String(), nullable=False, server_default='REPORT'))
+        batch_op.drop_index(batch_op.f('ix_report_otps_phone'))
+        batch_op.create_index('ix_report_otps_active', ['phone', 'otp'], unique=False, postgresql_where=sa.text('is_used = 0'), sqlite_where=sa.text('is_used = 0'))
+
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_sha256', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_reports_file_sha256'), ['file_sha256'], unique=False)
+        batch_op.create_index('ix_reports_phone_created', ['phone', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_users_updated_at'), ['updated_at'], unique=False)
+
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_updated_at'))
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('token_version')
+
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_index('ix_reports_phone_created')
+        batch_op.drop_index(batch_op.f('ix_reports_file_sha256'))
+        batch_op.drop_column('file_sha256')
+
+    with op.batch_alter_table('report_otps', schema=None) as batch_op:
+        batch_op.drop_index('ix_report_otps_active', postgresql_where=sa.text('is_used = 0'), sqlite_where=sa.text('is_used = 0'))
+        batch_op.create_index(batch_op.f('ix_report_otps_phone'), ['phone'], unique=False)
+        batch_op.drop_column('purpose')
+
+    with op.batch_alter_table('prescriptions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_prescriptions_user_id'))
+
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_inventory_item_name', type_='unique')
+        batch_op.drop_index('ix_inventory_low_stock', postgresql_where=sa.text('quantity <= reorder_level'), sqlite_where=sa.text('quantity <= reorder_level'))
+        batch_op.alter_column('quantity',
+               existing_type=sa.INTEGER(),
+               nullable=True)
+        batch_op.alter_column('item_name',
+               existing_type=sa.VARCHAR(),
+               nullable=True)
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('reorder_level')
+
+    with op.batch_alter_table('doctor_commissions', schema=None) as batch_op:
+        batch_op.drop_index('ix_doctor_commissions_doctor_created')
+        batch_op.drop_index(batch_op.f('ix_doctor_commissions_booking_id'))
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bookings_user_id'))
+        batch_op.drop_index(batch_op.f('ix_bookings_created_at'))
+        batch_op.drop_column('created_at')
+
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_attendance_employee_date', type_='unique')
+
+    with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+        batch_op.drop_index('ix_stock_movements_item_created')
+
+    op.drop_table('stock_movements')
+    op.drop_table('kiosk_punches')
+    op.drop_table('stored_files')
+    with op.batch_alter_table('doctor_commission_monthly', schema=None) as batch_op:
+        batch_op.drop_index('ix_doctor_commission_monthly_leaderboard')
+
+    op.drop_table('doctor_commission_monthly')
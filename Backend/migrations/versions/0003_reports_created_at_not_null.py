@@ -0,0 +1,58 @@
+"""reports created_at not null
+
+Reports added by manual inserts have no created_at, which the per-patient
+listing's (created_at, id) keyset can't page over. They are dated at the
+earliest known report (so they sort as the oldest, by id among themselves)
+and the column becomes NOT NULL with a UTC server default.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 18:05:12.408131
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _utc_now() -> str:
+    # The app writes datetime.utcnow(); now() would be in the session timezone
+    # (same expressions as app.core.database.utc_now)
+    name = op.get_bind().dialect.name
+    if name == "postgresql":
+        return "timezone('utc', now())"
+    if name == "sqlite":
+        return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+    return "CURRENT_TIMESTAMP"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    utc_now = _utc_now()
+    op.execute(
+        "UPDATE reports SET created_at = COALESCE("
+        f"(SELECT MIN(r2.created_at) FROM reports r2), {utc_now}) "
+        "WHERE created_at IS NULL"
+    )
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DateTime(),
+               nullable=False,
+               server_default=sa.text(f"({utc_now})"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DateTime(),
+               nullable=True,
+               server_default=None)
@@ -0,0 +1,113 @@
+"""unique commission per booking
+
+Concurrent compute-commissions runs could write two commissions for one
+booking. Every commission after the first for a booking is moved to
+doctor_commission_duplicates (nothing is deleted outright, so the extra
+payouts can be reviewed), booking_id becomes unique, and the monthly
+rollup is rebuilt without the archived rows.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 18:40:27.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, doctor_id, booking_id, test_amount, commission_percentage, "
+    "commission_amount, created_at"
+)
+DUPLICATES = (
+    "booking_id IS NOT NULL AND id NOT IN "
+    "(SELECT MIN(id) FROM doctor_commissions GROUP BY booking_id)"
+)
+
+
+def _rebuild_rollup() -> None:
+    # Same grouping as app.services.commission_rollup.rebuild_rollup
+    commissions = sa.table(
+        'doctor_commissions',
+        sa.column('doctor_id', sa.Integer()),
+        sa.column('commission_amount', sa.Float()),
+        sa.column('created_at', sa.DateTime()),
+    )
+    monthly = sa.table(
+        'doctor_commission_monthly',
+        sa.column('doctor_id'), sa.column('year'), sa.column('month'),
+        sa.column('total'), sa.column('count'),
+    )
+    year = sa.extract('year', commissions.c.created_at)
+    month = sa.extract('month', commissions.c.created_at)
+    source = sa.select(
+        commissions.c.doctor_id,
+        year,
+        month,
+        sa.func.sum(commissions.c.commission_amount),
+        sa.func.count(),
+    ).where(
+        commissions.c.doctor_id.is_not(None),
+        commissions.c.created_at.is_not(None),
+    ).group_by(commissions.c.doctor_id, year, month)
+
+    op.execute(sa.delete(monthly))
+    op.execute(sa.insert(monthly).from_select(
+        ['doctor_id', 'year', 'month', 'total', 'count'], source
+    ))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('doctor_commission_duplicates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=True),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.Column('test_amount', sa.Float(), nullable=True),
+    sa.Column('commission_percentage', sa.Float(), nullable=True),
+    sa.Column('commission_amount', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('doctor_commission_duplicates', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_doctor_commission_duplicates_booking_id'), ['booking_id'], unique=False)
+
+    # Keep the first commission of each booking, archive the rest
+    op.execute(
+        f"INSERT INTO doctor_commission_duplicates ({COLUMNS}, archived_at) "
+        f"SELECT {COLUMNS}, CURRENT_TIMESTAMP FROM doctor_commissions WHERE {DUPLICATES}"
+    )
+    op.execute(f"DELETE FROM doctor_commissions WHERE {DUPLICATES}")
+
+    with op.batch_alter_table('doctor_commissions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_doctor_commissions_booking_id'))
+        batch_op.create_index(batch_op.f('ix_doctor_commissions_booking_id'), ['booking_id'], unique=True)
+
+    _rebuild_rollup()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('doctor_commissions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_doctor_commissions_booking_id'))
+        batch_op.create_index(batch_op.f('ix_doctor_commissions_booking_id'), ['booking_id'], unique=False)
+
+    op.execute(
+        f"INSERT INTO doctor_commissions ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM doctor_commission_duplicates"
+    )
+    _rebuild_rollup()
+
+    with op.batch_alter_table('doctor_commission_duplicates', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_doctor_commission_duplicates_booking_id'))
+
+    op.drop_table('doctor_commission_duplicates')
@@ -0,0 +1,96 @@
+"""doctor commissions created_at not null
+
+The commission report pages on (created_at, id), which has no place for
+NULLs. Commissions without created_at (manual inserts) take their
+booking's created_at, or the earliest known commission if the booking is
+gone, and the column becomes NOT NULL with a UTC server default. The
+monthly rollup, which skipped undated commissions, is rebuilt.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 19:02:44.173520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _utc_now() -> str:
+    # The app writes datetime.utcnow(); now() would be in the session timezone
+    # (same expressions as app.core.database.utc_now)
+    name = op.get_bind().dialect.name
+    if name == "postgresql":
+        return "timezone('utc', now())"
+    if name == "sqlite":
+        return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+    return "CURRENT_TIMESTAMP"
+
+
+def _rebuild_rollup() -> None:
+    # Same grouping as app.services.commission_rollup.rebuild_rollup
+    commissions = sa.table(
+        'doctor_commissions',
+        sa.column('doctor_id', sa.Integer()),
+        sa.column('commission_amount', sa.Float()),
+        sa.column('created_at', sa.DateTime()),
+    )
+    monthly = sa.table(
+        'doctor_commission_monthly',
+        sa.column('doctor_id'), sa.column('year'), sa.column('month'),
+        sa.column('total'), sa.column('count'),
+    )
+    year = sa.extract('year', commissions.c.created_at)
+    month = sa.extract('month', commissions.c.created_at)
+    source = sa.select(
+        commissions.c.doctor_id,
+        year,
+        month,
+        sa.func.sum(commissions.c.commission_amount),
+        sa.func.count(),
+    ).where(
+        commissions.c.doctor_id.is_not(None),
+        commissions.c.created_at.is_not(None),
+    ).group_by(commissions.c.doctor_id, year, month)
+
+    op.execute(sa.delete(monthly))
+    op.execute(sa.insert(monthly).from_select(
+        ['doctor_id', 'year', 'month', 'total', 'count'], source
+    ))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    utc_now = _utc_now()
+    op.execute(
+        "UPDATE doctor_commissions SET created_at = COALESCE("
+        "(SELECT b.created_at FROM bookings b WHERE b.id = doctor_commissions.booking_id), "
+        "(SELECT MIN(dc.created_at) FROM doctor_commissions dc), "
+        f"{utc_now}) "
+        "WHERE created_at IS NULL"
+    )
+    with op.batch_alter_table('doctor_commissions', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DateTime(),
+               nullable=False,
+               server_default=sa.text(f"({utc_now})"))
+
+    # The rollup skipped the undated commissions
+    _rebuild_rollup()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('doctor_commissions', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.DateTime(),
+               nullable=True,
+               server_default=None)